@@ -0,0 +1,146 @@
+import asyncio
+import logging
+import random
+import time
+
+import aiohttp
+import discord
+
+log = logging.getLogger('docbot.actions')
+
+
+class ActionQueue:
+    """Per-guild queue of pending moderation API calls.
+
+    Actions are keyed by ``(target_id, kind)`` within a guild so a newer
+    action replaces an older pending one with the same key, and an action
+    that undoes a pending one (e.g. an unmute queued behind a mute that was
+    never sent) cancels both. Each guild is drained by its own worker, paced
+    by a token bucket, and transient failures are retried with jittered
+    exponential backoff. ``observer`` is told about every attempt, e.g. to
+    record metrics.
+    """
+
+    def __init__(self, rate=5.0, burst=10, retries=3, backoff=1.0, observer=None):
+        self._rate = rate  # actions per second per guild, None for unpaced
+        self._burst = burst
+        self._retries = retries
+        self._backoff = backoff
+        self._pending = {}  # { guild_id: { key: (factory, on_failure, not_found_ok) } }
+        self._workers = {}  # { guild_id: Task }
+        self._running = {}  # { guild_id: key } of the action each worker is running
+        self._observer = observer  # called as observer(kind, seconds, error=None) per attempt
+
+    def enqueue(self, guild_id, key, factory, cancels=None, on_failure=None, not_found_ok=True):
+        """Queue ``factory()`` (a coroutine function) to run for ``guild_id``.
+
+        If ``cancels`` names a pending action, both are dropped instead.
+        ``on_failure`` is called when the action is given up on. A 404 means
+        the target is already gone, which counts as done unless
+        ``not_found_ok`` is False (e.g. posting to a deleted channel).
+        """
+        pending = self._pending.get(guild_id)
+        if pending is None:
+            pending = self._pending[guild_id] = {}
+        if cancels is not None and pending.pop(cancels, None) is not None:
+            return
+        pending[key] = (factory, on_failure, not_found_ok)
+        if guild_id not in self._workers:
+            self._workers[guild_id] = asyncio.create_task(self._drain(guild_id))
+
+    def discard(self, guild_id, key):
+        """Drop a pending action. Returns False if it was not pending."""
+        pending = self._pending.get(guild_id)
+        return bool(pending) and pending.pop(key, None) is not None
+
+    def is_pending(self, guild_id, key):
+        pending = self._pending.get(guild_id)
+        return bool(pending) and key in pending
+
+    def in_flight(self, guild_id, key):
+        """Whether the action is being run (or retried) right now."""
+        return self._running.get(guild_id) == key
+
+    def depth(self, guild_id=None):
+        """Number of pending actions for one guild, or for all of them."""
+        if guild_id is not None:
+            return len(self._pending.get(guild_id, ()))
+        return sum(len(pending) for pending in self._pending.values())
+
+    def depths(self):
+        """Number of pending actions of every guild with a non-empty queue."""
+        return {guild_id: len(pending) for guild_id, pending in self._pending.items() if pending}
+
+    async def join(self, guild_id=None):
+        """Wait until one guild's queue, or every guild's queue, is drained."""
+        if guild_id is not None:
+            worker = self._workers.get(guild_id)
+            if worker is not None:
+                await asyncio.shield(worker)
+            return
+        while self._workers:
+            await asyncio.gather(*self._workers.values())
+
+    async def _drain(self, guild_id):
+        pending = self._pending[guild_id]
+        tokens = self._burst
+        refilled = time.monotonic()
+        try:
+            while pending:
+                if self._rate is not None:
+                    now = time.monotonic()
+                    tokens = min(self._burst, tokens + (now - refilled) * self._rate)
+                    refilled = now
+                    if tokens < 1:
+                        await asyncio.sleep((1 - tokens) / self._rate)
+                        continue
+                    tokens -= 1
+
+                key = next(iter(pending))
+                factory, on_failure, not_found_ok = pending.pop(key)
+                self._running[guild_id] = key
+                try:
+                    await self._run(guild_id, key, factory, on_failure, not_found_ok)
+                finally:
+                    del self._running[guild_id]
+        finally:
+            del self._pending[guild_id]
+            del self._workers[guild_id]
+
+    async def _run(self, guild_id, key, factory, on_failure, not_found_ok=True):
+        for attempt in range(self._retries + 1):
+            start = time.perf_counter()
+            try:
+                await factory()
+                if self._observer is not None:
+                    self._observer(key[1], time.perf_counter() - start)
+                return
+            except discord.errors.NotFound as e:
+                if not_found_ok:
+                    # The target is already gone, nothing left to do
+                    if self._observer is not None:
+                        self._observer(key[1], time.perf_counter() - start, e)
+                    return
+                error = e
+                transient = False
+            except discord.errors.HTTPException as e:
+                error = e
+                transient = e.status == 429 or e.status >= 500
+            except (aiohttp.ClientError, asyncio.TimeoutError, OSError) as e:
+                error = e
+                transient = True
+            except Exception as e:
+                error = e
+                transient = False
+
+            if self._observer is not None:
+                self._observer(key[1], time.perf_counter() - start, error)
+            if not transient or attempt == self._retries:
+                break
+            await asyncio.sleep(self._backoff * 2 ** attempt * random.uniform(0.5, 1.5))
+
+        log.warning('API call failed', extra={
+            'guild_id': guild_id, 'action': key[1], 'target': str(key[0]), 'error': repr(error),
+        })
+        if on_failure is not None:
+            on_failure()
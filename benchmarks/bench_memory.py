@@ -0,0 +1,116 @@
+"""Resident memory of discord.py's guild cache under each runtime profile.
+
+Builds a client with docbot's client options, feeds it synthetic
+GUILD_CREATE payloads and channel messages as the gateway would and
+reports the RSS they add per 1,000 guilds. Each profile runs in its own
+process so they do not share allocator state::
+
+    python -m benchmarks.bench_memory
+    python -m benchmarks.bench_memory --guilds 5000 --profile lean
+"""
+import argparse
+import gc
+import itertools
+import resource
+import subprocess
+import sys
+import time
+
+import discord
+
+import docbot
+
+PROFILES = ('default', 'lean')
+
+MEMBER = {'roles': [], 'joined_at': None, 'deaf': False, 'mute': False, 'flags': 0}
+
+_ids = itertools.count(int((time.time() * 1000 - 1420070400000)) << 22)
+
+
+def _user(user_id):
+    return {'id': str(user_id), 'username': f'user-{user_id}', 'discriminator': '0', 'avatar': None}
+
+
+def guild_payload(members, in_voice, text_channels, voice_channels, emojis):
+    """A GUILD_CREATE payload of a mid-sized community server."""
+    guild_id = next(_ids)
+    channels = [{'id': str(next(_ids)), 'type': 0, 'name': f'text-{i}', 'position': i,
+                 'permission_overwrites': []} for i in range(text_channels)]
+    channels += [{'id': str(next(_ids)), 'type': 2, 'name': f'voice-{i}', 'position': i,
+                  'bitrate': 64000, 'user_limit': 0, 'permission_overwrites': []} for i in range(voice_channels)]
+    member_ids = [next(_ids) for _ in range(members)]
+    voice_channel_id = channels[text_channels]['id']
+    return {
+        'id': str(guild_id),
+        'name': f'guild-{guild_id}',
+        'owner_id': str(member_ids[0]),
+        'member_count': members,
+        'roles': [{'id': str(guild_id), 'name': '@everyone', 'permissions': '104324673', 'position': 0,
+                   'color': 0, 'hoist': False, 'managed': False, 'mentionable': False}],
+        'emojis': [{'id': str(next(_ids)), 'name': f'emoji{i}', 'roles': [], 'require_colons': True,
+                    'managed': False, 'animated': False, 'available': True} for i in range(emojis)],
+        'channels': channels,
+        'members': [{'user': _user(member_id), **MEMBER} for member_id in member_ids],
+        'voice_states': [{'user_id': str(member_id), 'channel_id': voice_channel_id, 'session_id': 'x',
+                          'deaf': False, 'mute': False, 'self_deaf': False, 'self_mute': False,
+                          'self_video': False, 'suppress': False} for member_id in member_ids[:in_voice]],
+    }
+
+
+def message_payload(guild, channel):
+    return {
+        'id': str(next(_ids)), 'channel_id': str(channel.id), 'guild_id': str(guild.id),
+        'author': _user(next(_ids)), 'member': MEMBER,
+        'content': 'x' * 80, 'timestamp': '2024-01-01T00:00:00+00:00', 'edited_timestamp': None,
+        'tts': False, 'mention_everyone': False, 'mentions': [], 'mention_roles': [],
+        'attachments': [], 'embeds': [], 'pinned': False, 'type': 0,
+    }
+
+
+def rss_kib():
+    # Peak RSS; it only grows while the cache is filled, so it tracks the current size
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def measure(profile, guilds, messages, **shape):
+    """RSS added by ``guilds`` guilds and ``messages`` messages, in KiB."""
+    client = discord.Client(**docbot.client_options(profile))
+    state = client._connection
+    gc.collect()
+    before = rss_kib()
+    cached = [state._add_guild_from_data(guild_payload(**shape)) for _ in range(guilds)]
+    for i in range(messages):
+        guild = cached[i % guilds]
+        state.parse_message_create(message_payload(guild, guild.text_channels[0]))
+    gc.collect()
+    return rss_kib() - before, sum(len(guild._members) for guild in cached), len(state._messages or ())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--profile', choices=PROFILES, action='append',
+                        help='runtime profile to measure (repeatable, default: all)')
+    parser.add_argument('--guilds', type=int, default=2000, help='guilds to cache')
+    parser.add_argument('--members', type=int, default=50, help='members sent per GUILD_CREATE')
+    parser.add_argument('--in-voice', type=int, default=5, help='of which are in a voice channel')
+    parser.add_argument('--messages', type=int, default=5000, help='messages received across all guilds')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    shape = {'members': args.members, 'in_voice': args.in_voice, 'text_channels': 10,
+             'voice_channels': 3, 'emojis': 20}
+
+    if args.child:
+        rss, members, messages = measure(args.profile[0], args.guilds, args.messages, **shape)
+        print(f"== {args.profile[0]}")
+        print(f"   guilds: {args.guilds}  cached members: {members}  cached messages: {messages}")
+        print(f"   RSS: {rss / 1024:,.1f} MiB  per 1k guilds: {rss / 1024 / args.guilds * 1000:,.1f} MiB")
+        return
+
+    for profile in args.profile or PROFILES:
+        subprocess.run([sys.executable, '-m', 'benchmarks.bench_memory', '--child', '--profile', profile,
+                        '--guilds', str(args.guilds), '--members', str(args.members),
+                        '--in-voice', str(args.in_voice), '--messages', str(args.messages)], check=True)
+
+
+if __name__ == '__main__':
+    main()
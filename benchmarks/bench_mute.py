@@ -0,0 +1,37 @@
+"""API calls per meeting under each mute strategy.
+
+Runs the meeting scenarios of bench_voice once per strategy and prints the
+Discord API calls each one made::
+
+    python -m benchmarks.bench_mute
+    python -m benchmarks.bench_mute --scenario meeting_join
+"""
+import argparse
+import asyncio
+from collections import defaultdict
+
+import docbot
+from benchmarks import bench_voice
+from benchmarks.fakes import FakeWorld
+
+SCENARIOS = ('meeting', 'meeting_join', 'camera_flap')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scenario', choices=SCENARIOS, action='append',
+                        help='scenario to run (repeatable, default: all)')
+    args = parser.parse_args()
+
+    for name in args.scenario or SCENARIOS:
+        print(f"== {name}")
+        for strategy in docbot.MUTE_STRATEGIES:
+            bench_voice.OPTIONS['mute_strategy'] = strategy
+            world = FakeWorld()
+            events, _ = asyncio.run(bench_voice.run_waves(bench_voice.SCENARIOS[name](world), defaultdict(list)))
+            calls = world.http.calls
+            print(f"   {strategy:<8} events: {events:<6} API calls: {sum(calls.values()):<6} {dict(calls)}")
+
+
+if __name__ == '__main__':
+    main()
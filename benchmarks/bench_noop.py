@@ -0,0 +1,77 @@
+"""Micro-benchmark of on_voice_state_update per kind of voice transition.
+
+Self-mute, self-deafen, streaming and suppress toggles in a monitored
+channel cannot change enforcement and should cost next to nothing next to
+the camera toggles that do::
+
+    python -m benchmarks.bench_noop
+    python -m benchmarks.bench_noop --events 500000
+"""
+import argparse
+import asyncio
+import time
+
+import docbot
+from benchmarks.fakes import FakeVoiceState, FakeWorld
+
+
+def toggled(state, **changes):
+    after = FakeVoiceState(state.channel, state.self_video, state.mute)
+    for field in ('self_mute', 'self_deaf', 'self_stream', 'suppress'):
+        setattr(after, field, changes.get(field, getattr(state, field)))
+    return after
+
+
+async def measure(events):
+    world = FakeWorld()
+    guild = world.add_guild()
+    channel = guild.voice_channels[0]
+    member = guild.add_member()
+    world.install(docbot)
+    idle = guild.add_member()  # in an unmonitored channel
+    world.join(idle, world.add_guild().voice_channels[0])
+
+    await docbot.on_voice_state_update(*world.join(member, channel, self_video=True))
+    await asyncio.sleep(0)
+    state = member.voice
+
+    cases = {
+        'self_mute': (member, state, toggled(state, self_mute=True)),
+        'self_deaf': (member, state, toggled(state, self_deaf=True)),
+        'stream': (member, state, toggled(state, self_stream=True)),
+        'suppress': (member, state, toggled(state, suppress=True)),
+        'unmonitored': (idle, idle.voice, toggled(idle.voice, self_mute=True)),
+    }
+    results = {}
+    for label, args in cases.items():
+        start = time.perf_counter()
+        for _ in range(events):
+            await docbot.on_voice_state_update(*args)
+        results[label] = (time.perf_counter() - start) / events
+        await asyncio.sleep(0)
+
+    # A relevant transition for comparison: the camera going off and on
+    off = FakeVoiceState(channel, False, state.mute)
+    on = FakeVoiceState(channel, True, state.mute)
+    start = time.perf_counter()
+    for i in range(events):
+        await docbot.on_voice_state_update(member, on, off) if i % 2 == 0 else \
+            await docbot.on_voice_state_update(member, off, on)
+    results['camera_toggle'] = (time.perf_counter() - start) / events
+    docbot.member_mailbox.clear()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--events', type=int, default=200_000, help='events per transition kind')
+    args = parser.parse_args()
+
+    results = asyncio.run(measure(args.events))
+    print(f"== voice transitions ({args.events} events each)")
+    for label, seconds in results.items():
+        print(f"   {label:<13} {seconds * 1e9:8.0f} ns/event")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,186 @@
+"""Synthetic voice-event benchmarks for docbot's enforcement path.
+
+Drives on_voice_state_update and expire_warning against fake guilds and a
+fake HTTP layer, drains the action queue after every wave and reports
+throughput, handler latency, memory allocated and retained per event and
+peak memory per scenario::
+
+    python -m benchmarks.bench_voice
+    python -m benchmarks.bench_voice --scenario meeting_join --latency 0.05
+    python -m benchmarks.bench_voice --warning-mode digest
+"""
+import argparse
+import asyncio
+import gc
+import statistics
+import time
+import tracemalloc
+from collections import defaultdict
+
+import docbot
+from benchmarks import fakes
+from benchmarks.fakes import FakeWorld
+
+
+def many_guilds(world, guilds=10_000):
+    """One member per guild joins camera-off, turns the camera on, then leaves."""
+    members = []
+    for _ in range(guilds):
+        guild = world.add_guild()
+        members.append((guild.add_member(), guild.voice_channels[0]))
+    world.install(docbot, **OPTIONS)
+    yield [('join', world.join(m, channel)) for m, channel in members]
+    yield [('camera_on', world.set_video(m, True)) for m, _ in members]
+    yield [('leave', world.leave(m)) for m, _ in members]
+
+
+def meeting_join(world, members=500):
+    """A whole meeting joins one channel camera-off and is kicked at the deadline."""
+    guild = world.add_guild()
+    channel = guild.voice_channels[0]
+    meeting = [guild.add_member() for _ in range(members)]
+    world.install(docbot, **OPTIONS)
+    yield [('join', world.join(m, channel)) for m in meeting]
+    yield [('kick', (guild.id, m.id)) for m in meeting]
+
+
+def meeting(world, members=200):
+    """A meeting joins camera-off, everyone turns their camera on, then everyone leaves."""
+    guild = world.add_guild()
+    channel = guild.voice_channels[0]
+    attendees = [guild.add_member() for _ in range(members)]
+    world.install(docbot, **OPTIONS)
+    yield [('join', world.join(m, channel)) for m in attendees]
+    yield [('camera_on', world.set_video(m, True)) for m in attendees]
+    yield [('leave', world.leave(m)) for m in attendees]
+
+
+def camera_flap(world, members=200, flaps=20):
+    """Members join camera-on and keep toggling their camera off and on."""
+    guild = world.add_guild()
+    channel = guild.voice_channels[0]
+    flappers = [guild.add_member() for _ in range(members)]
+    world.install(docbot, **OPTIONS)
+    yield [('join', world.join(m, channel, self_video=True)) for m in flappers]
+    for _ in range(flaps):
+        yield [('camera_off', world.set_video(m, False)) for m in flappers]
+        yield [('camera_on', world.set_video(m, True)) for m in flappers]
+
+
+# Per-guild settings every scenario installs, filled from the command line
+OPTIONS = {}
+
+# Each scenario builds its guilds, installs the world into docbot and then
+# yields waves of (label, args) events
+SCENARIOS = {
+    'many_guilds': many_guilds,
+    'meeting_join': meeting_join,
+    'meeting': meeting,
+    'camera_flap': camera_flap,
+}
+
+
+async def dispatch(label, args):
+    if label == 'kick':
+        docbot.expire_warning(*args)
+    else:
+        await docbot.on_voice_state_update(*args)
+
+
+async def run_waves(waves, latencies, allocated=None):
+    """Dispatch each wave concurrently (like gateway events), waves in order.
+
+    Waves are generated lazily so each one sees the state left by the
+    previous one. Returns the number of events and the time spent handling them.
+    With tracemalloc running, the bytes each wave allocated on top of what was
+    live when it started (its high-water mark) are appended to ``allocated``.
+    """
+    async def timed(label, args):
+        start = time.perf_counter()
+        await dispatch(label, args)
+        latencies[label].append(time.perf_counter() - start)
+
+    events = 0
+    elapsed = 0.0
+    for wave in waves:
+        events += len(wave)
+        if allocated is not None:
+            tracemalloc.reset_peak()
+            live, _ = tracemalloc.get_traced_memory()
+        start = time.perf_counter()
+        await asyncio.gather(*(timed(label, args) for label, args in wave))
+        drain_start = time.perf_counter()
+        docbot.flush_warning_messages()
+        await docbot.action_queue.join()
+        latencies['queue_drain'].append(time.perf_counter() - drain_start)
+        elapsed += time.perf_counter() - start
+        if allocated is not None:
+            allocated.append(tracemalloc.get_traced_memory()[1] - live)
+    return events, elapsed
+
+
+def percentile(samples, q):
+    if len(samples) < 2:
+        return samples[0] if samples else 0.0
+    return statistics.quantiles(samples, n=1000, method='inclusive')[int(q * 1000) - 1]
+
+
+def run_scenario(name, latency):
+    # Timed pass
+    world = FakeWorld(latency)
+    waves = SCENARIOS[name](world)
+    latencies = defaultdict(list)
+    gc.collect()
+    events, elapsed = asyncio.run(run_waves(waves, latencies))
+    calls = dict(world.http.calls)
+
+    # Memory pass on a fresh world, traced separately so it does not skew timings
+    world = FakeWorld(latency)
+    waves = SCENARIOS[name](world)
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    allocated = []
+    asyncio.run(run_waves(waves, defaultdict(list), allocated))
+    gc.collect()
+    after = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # Leave out the fake guilds and members the scenario builds while it runs
+    fixtures = [tracemalloc.Filter(False, fakes.__file__), tracemalloc.Filter(False, __file__)]
+    retained = sum(stat.count_diff for stat in after.filter_traces(fixtures).compare_to(
+        before.filter_traces(fixtures), 'filename')) / events
+
+    print(f"== {name} (latency {latency * 1000:.0f} ms)")
+    print(f"   events: {events}  events/sec: {events / elapsed:,.0f}  "
+          f"peak allocated bytes/event: {sum(allocated) / events:,.0f}  "
+          f"retained blocks/event: {retained:.1f}  peak traced memory: {peak / 1024:,.0f} KiB")
+    for label, samples in latencies.items():
+        print(f"   {label:<11} n={len(samples):<6} p50={percentile(samples, 0.5) * 1e6:8.1f} us  "
+              f"p99={percentile(samples, 0.99) * 1e6:8.1f} us")
+    print(f"   http calls: {calls}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scenario', choices=sorted(SCENARIOS), action='append',
+                        help='scenario to run (repeatable, default: all)')
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='simulated latency of every API call in seconds')
+    parser.add_argument('--warning-mode', choices=docbot.WARNING_MODES, default='message',
+                        help='per-guild warning mode to benchmark')
+    parser.add_argument('--mute-strategy', choices=docbot.MUTE_STRATEGIES, default='member',
+                        help='per-guild mute strategy to benchmark')
+    parser.add_argument('--camera-grace', type=int, default=0,
+                        help='per-guild camera-off grace period in seconds')
+    args = parser.parse_args()
+    OPTIONS['warning_mode'] = args.warning_mode
+    OPTIONS['camera_grace'] = args.camera_grace
+    OPTIONS['mute_strategy'] = args.mute_strategy
+
+    for name in args.scenario or SCENARIOS:
+        run_scenario(name, args.latency)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,216 @@
+"""Lightweight stand-ins for the discord.py objects docbot touches.
+
+Every API call goes through a FakeHTTP, which counts calls by kind and can
+add a fixed latency, so benchmarks measure docbot's own overhead and the
+number of requests it would make.
+"""
+import asyncio
+import itertools
+import time
+from collections import Counter
+
+import discord
+
+from actions import ActionQueue
+from scheduler import TimerWheel
+from storage import ConfigStore
+
+# Start at a snowflake of the current time so fake messages count as recent
+_ids = itertools.count(int((time.time() * 1000 - 1420070400000)) << 22)
+
+
+class FakeHTTP:
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.calls = Counter()
+
+    async def request(self, kind):
+        self.calls[kind] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+
+class FakeMessage:
+    __slots__ = ('id', 'channel', 'content')
+
+    def __init__(self, channel, message_id, content=None):
+        self.id = message_id
+        self.channel = channel
+        self.content = content
+
+    async def delete(self):
+        await self.channel.http.request('message.delete')
+
+    async def edit(self, content):
+        await self.channel.http.request('message.edit')
+        self.content = content
+
+
+class FakeTextChannel:
+    def __init__(self, http, guild, channel_id=None):
+        self.id = channel_id or next(_ids)
+        self.guild = guild
+        self.http = http
+        self.mention = f'<#{self.id}>'
+        self.manage_messages = True  # whether the bot may bulk delete here
+
+    def permissions_for(self, member):
+        return discord.Permissions(manage_messages=self.manage_messages)
+
+    async def send(self, content):
+        await self.http.request('message.send')
+        return FakeMessage(self, next(_ids), content)
+
+    def get_partial_message(self, message_id):
+        return FakeMessage(self, message_id)
+
+    async def delete_messages(self, messages):
+        await self.http.request('message.bulk_delete')
+
+
+class FakeVoiceChannel:
+    def __init__(self, guild, channel_id=None):
+        self.id = channel_id or next(_ids)
+        self.guild = guild
+        self.mention = f'<#{self.id}>'
+        self.overwrites = {}
+
+    async def edit(self, overwrites):
+        await self.guild.http.request('channel.edit')
+        self.overwrites = overwrites
+
+    @property
+    def members(self):
+        return [m for m in self.guild.members.values() if m.voice is not None and m.voice.channel is self]
+
+
+class FakeVoiceState:
+    __slots__ = ('channel', 'self_video', 'mute', 'self_mute', 'self_deaf', 'self_stream', 'suppress')
+
+    def __init__(self, channel=None, self_video=False, mute=False):
+        self.channel = channel
+        self.self_video = self_video
+        self.mute = mute
+        self.self_mute = False
+        self.self_deaf = False
+        self.self_stream = False
+        self.suppress = False
+
+
+class FakeMember:
+    def __init__(self, http, guild, member_id=None):
+        self.id = member_id or next(_ids)
+        self.guild = guild
+        self.http = http
+        self.bot = False
+        self.name = f'member-{self.id}'
+        self.mention = f'<@{self.id}>'
+        self.voice = None
+        self.muted = False  # server mutes outlast voice sessions
+
+    async def edit(self, mute):
+        await self.http.request('member.mute' if mute else 'member.unmute')
+        self.muted = mute
+        if self.voice:
+            self.voice.mute = mute
+
+    async def move_to(self, channel):
+        await self.http.request('member.move')
+        self.voice = None
+
+
+class FakeGuild:
+    def __init__(self, http, voice_channels=1, guild_id=None, text_channel_id=None):
+        self.id = guild_id or next(_ids)
+        self.name = f'guild-{self.id}'
+        self.http = http
+        self.members = {}
+        self.me = None
+        self.default_role = discord.Object(self.id, type=discord.Role)
+        self.text_channel = FakeTextChannel(http, self, text_channel_id)
+        self.voice_channels = [FakeVoiceChannel(self) for _ in range(voice_channels)]
+
+    def get_member(self, member_id):
+        return self.members.get(member_id)
+
+    def add_member(self, member_id=None):
+        member = FakeMember(self.http, self, member_id)
+        self.members[member.id] = member
+        return member
+
+    def add_voice_channel(self, channel_id=None):
+        channel = FakeVoiceChannel(self, channel_id)
+        self.voice_channels.append(channel)
+        return channel
+
+
+class FakeWorld:
+    """A set of fake guilds plus helpers producing ``(member, before, after)`` voice events."""
+
+    def __init__(self, latency=0.0):
+        self.http = FakeHTTP(latency)
+        self.guilds = {}
+        self.channels = {}
+
+    def add_guild(self, voice_channels=1, guild_id=None, text_channel_id=None):
+        guild = FakeGuild(self.http, voice_channels, guild_id, text_channel_id)
+        self.guilds[guild.id] = guild
+        self.channels[guild.text_channel.id] = guild.text_channel
+        for channel in guild.voice_channels:
+            self.channels[channel.id] = channel
+        return guild
+
+    def add_voice_channel(self, guild, channel_id=None):
+        channel = guild.add_voice_channel(channel_id)
+        self.channels[channel.id] = channel
+        return channel
+
+    def move(self, member, channel, self_video=False):
+        before = member.voice or FakeVoiceState()
+        after = FakeVoiceState(channel, self_video, member.muted) if channel else FakeVoiceState()
+        member.voice = after if channel else None
+        return member, before, after
+
+    def join(self, member, channel, self_video=False):
+        return self.move(member, channel, self_video)
+
+    def leave(self, member):
+        return self.move(member, None)
+
+    def set_video(self, member, self_video):
+        return self.move(member, member.voice.channel, self_video)
+
+    def install(self, docbot, guilds=None, **options):
+        """Point docbot at this world with in-memory storage and fresh warning state.
+
+        ``options`` are per-guild settings (e.g. ``warning_mode='digest'``) applied to every guild.
+        ``guilds`` replaces the generated guild configs, e.g. with those of a recording.
+        """
+        docbot.bot.get_guild = self.guilds.get
+        docbot.bot.get_channel = self.channels.get
+
+        if guilds is None:
+            guilds = {
+                str(guild.id): {
+                    'voice_channels': [channel.id for channel in guild.voice_channels],
+                    'text_channel_id': guild.text_channel.id,
+                }
+                for guild in self.guilds.values()
+            }
+        guilds = {guild_id_str: {**guild_config, **options} for guild_id_str, guild_config in guilds.items()}
+        docbot.config['guilds'] = guilds
+        docbot.config_store = ConfigStore(guilds)
+        docbot.guild_warnings.clear()
+        docbot.member_states.clear()
+        docbot.member_mailbox.clear()
+        docbot.mailbox_scheduled = False
+        docbot.open_digests.clear()
+        docbot.status_boards.clear()
+        docbot.deletion_buffers.clear()
+        docbot.speak_overwrites.clear()
+        docbot.join_rates.clear()
+        docbot.bot_mutes.clear()
+        docbot.warning_timers = TimerWheel(docbot.kick_expired)
+        docbot.grace_timers = TimerWheel(docbot.grace_expired, tick=0.25)
+        docbot.action_queue = ActionQueue(rate=None, observer=docbot.metrics.record_action)  # pacing would only measure the sleep
+        docbot.rebuild_policies()
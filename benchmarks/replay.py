@@ -0,0 +1,286 @@
+"""Replays a voice recording against fake guilds on a virtual clock.
+
+Recordings are written by the bot when ``"voice_recording"`` is set in
+config.json (see recorder.py). Events are fed to on_voice_state_update at
+their recorded times, but the event loop's clock jumps straight to the next
+timer instead of sleeping, and docbot, the action queue and the timer wheels
+read the same virtual clock. Warning deadlines, grace periods, digest
+windows and API pacing therefore play out as recorded while a day of
+traffic replays in seconds::
+
+    python -m benchmarks.replay voice.jsonl
+    python -m benchmarks.replay voice.jsonl --latency 0.15 --warning-mode digest
+    python -m benchmarks.replay --synthesize day.jsonl --guilds 50
+
+Server mutes are not replayed from the recording: the fake members carry the
+mutes applied by the replayed bot itself, so recorded echoes of the original
+bot's mutes turn into no-op events. Latencies are reported in virtual time,
+so they show deadlines, pacing and HTTP latency rather than CPU time; the
+CPU cost shows in the replay's real duration.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import selectors
+import time
+
+import actions
+import docbot
+import scheduler
+from actions import ActionQueue
+from benchmarks.fakes import FakeVoiceState, FakeWorld
+from metrics import GuildStats
+from scheduler import TimerWheel
+
+
+class VirtualClockLoop(asyncio.SelectorEventLoop):
+    """Event loop that never sleeps: when idle, its clock jumps to the next timer.
+
+    File descriptors (e.g. worker threads waking the loop) are still polled,
+    and the loop blocks for real only when it has no timer at all.
+    """
+
+    def __init__(self):
+        self._now = 0.0
+        selector = _VirtualSelector(self)
+        super().__init__(selector)
+
+    def time(self):
+        return self._now
+
+
+class _VirtualSelector(selectors.DefaultSelector):
+    def __init__(self, loop):
+        super().__init__()
+        self._loop = loop
+
+    def select(self, timeout=None):
+        if timeout is None:
+            return super().select(None)
+        events = super().select(0)
+        if not events and timeout > 0:
+            self._loop._now += timeout
+        return events
+
+
+class VirtualTime:
+    """Stand-in for the ``time`` module reading the virtual loop clock.
+
+    ``time()`` starts at ``epoch``, the unix time of the first recorded event.
+    """
+
+    def __init__(self, loop, epoch):
+        self._loop = loop
+        self._epoch = epoch
+
+    def time(self):
+        return self._epoch + self._loop.time()
+
+    def monotonic(self):
+        return self._loop.time()
+
+    perf_counter = monotonic
+
+
+def read_recording(path):
+    """Yield ``('guilds', configs)`` and ``('event', dict)`` items of a recording."""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            if 'guilds' in item:
+                yield 'guilds', item['guilds']
+            else:
+                yield 'event', item
+
+
+def build_world(world, guilds):
+    """Create fake guilds and channels with the ids of the recorded guild configs."""
+    for guild_id_str, guild_config in guilds.items():
+        guild_id = int(guild_id_str)
+        guild = world.guilds.get(guild_id)
+        if guild is None:
+            guild = world.add_guild(0, guild_id, guild_config.get('text_channel_id'))
+        for channel_id in guild_config.get('voice_channels', []):
+            if channel_id not in world.channels:
+                world.add_voice_channel(guild, channel_id)
+
+
+def voice_event(world, event):
+    """Turn a recorded event into ``(member, before, after)`` for the fake world."""
+    guild = world.guilds.get(event['g'])
+    if guild is None:
+        guild = world.add_guild(0, event['g'])
+    member = guild.get_member(event['m']) or guild.add_member(event['m'])
+    channel = None
+    if event['ca'] is not None:
+        channel = world.channels.get(event['ca']) or world.add_voice_channel(guild, event['ca'])
+    before = member.voice or FakeVoiceState()
+    after = FakeVoiceState(channel, event['va'], member.muted) if channel else FakeVoiceState()
+    member.voice = after if channel else None
+    return member, before, after
+
+
+async def replay(path, options, latency, paced):
+    loop = asyncio.get_running_loop()
+    items = read_recording(path)
+    kind, guilds = next(items, ('guilds', {}))
+    if kind != 'guilds':
+        raise SystemExit(f'{path}: recording does not start with the guild configuration')
+
+    world = FakeWorld(latency)
+    build_world(world, guilds)
+    world.install(docbot, guilds, **options)
+
+    started = time.perf_counter()
+    epoch = None
+    for event_kind, item in items:
+        if event_kind == 'guilds':
+            changes = {guild_id_str: item.get(guild_id_str)
+                       for guild_id_str in docbot.config['guilds'].keys() | item.keys()
+                       if docbot.config['guilds'].get(guild_id_str) != item.get(guild_id_str)}
+            if changes:
+                build_world(world, item)
+                docbot.apply_config_changes({k: v and {**v, **options} for k, v in changes.items()})
+            continue
+        if epoch is None:
+            # Switch every clock docbot reads to virtual time, starting at the first event
+            epoch = item['t']
+            clock = VirtualTime(loop, epoch - loop.time())
+            docbot.time = actions.time = scheduler.time = clock
+            docbot.warning_timers = TimerWheel(docbot.kick_expired, clock=clock.time)
+            docbot.grace_timers = TimerWheel(docbot.grace_expired, tick=0.25, clock=clock.time)
+            if paced:
+                docbot.action_queue = ActionQueue(observer=docbot.metrics.record_action)
+            docbot.warning_timers.start()
+            docbot.grace_timers.start()
+            events = 0
+        # Yield even between simultaneous events, as each gateway event is dispatched on its own
+        await asyncio.sleep(max(0.0, item['t'] - clock.time()))
+        await docbot.on_voice_state_update(*voice_event(world, item))
+        events += 1
+        last = item['t']
+
+    if epoch is None:
+        raise SystemExit(f'{path}: recording holds no voice events')
+    # Let every pending deadline fire and every queued call land
+    await asyncio.sleep(docbot.MAX_CAMERA_GRACE + docbot.WARNING_DELAY + docbot.BOARD_INTERVAL + 1)
+    docbot.flush_warning_messages()
+    await docbot.action_queue.join()
+    docbot.warning_timers.stop()
+    docbot.grace_timers.stop()
+    await asyncio.sleep(0)
+    return events, last - epoch, clock.time() - epoch, time.perf_counter() - started, dict(world.http.calls)
+
+
+def synthesize(path, guilds, members, seed=0):
+    """Write a recording of a synthetic working day of meetings.
+
+    Every guild holds an hourly meeting from 9:00 to 17:00 in one of two
+    monitored channels. Most attendees turn their camera on within seconds,
+    some only once warned, a few never (and are kicked), and some flap
+    their camera during the meeting. Returns the number of events written.
+    """
+    rng = random.Random(seed)
+    day = 1_700_000_000 - 1_700_000_000 % 86400
+    ids = itertools.count(10 ** 17)
+    configs = {}
+    events = []
+
+    def emit(at, guild_id, member_id, before, after):
+        events.append({'t': round(at, 3), 'g': guild_id, 'm': member_id, 'cb': before[0], 'ca': after[0],
+                       'vb': before[1], 'va': after[1], 'mb': False, 'ma': False})
+        return after
+
+    for _ in range(guilds):
+        guild_id = next(ids)
+        channels = [next(ids), next(ids)]
+        lobby = next(ids)  # unmonitored
+        configs[str(guild_id)] = {'voice_channels': channels, 'text_channel_id': next(ids)}
+        roster = [next(ids) for _ in range(members)]
+        for hour in range(9, 17):
+            channel = rng.choice(channels)
+            start = day + hour * 3600
+            end = start + rng.uniform(1800, 3300)
+            for member_id in rng.sample(roster, rng.randint(members // 4, members)):
+                t = start + rng.expovariate(1 / 60)
+                state = (None, False)
+                if rng.random() < 0.2:
+                    state = emit(t, guild_id, member_id, state, (lobby, False))
+                    t += rng.uniform(5, 60)
+                state = emit(t, guild_id, member_id, state, (channel, False))
+                roll = rng.random()
+                if roll < 0.05:
+                    continue  # kicked at the deadline; the kick's own leave is not a member event here
+                t += rng.uniform(1, 10) if roll < 0.85 else rng.uniform(20, 110)
+                state = emit(t, guild_id, member_id, state, (channel, True))
+                while rng.random() < 0.2 and t < end - 900:
+                    t += rng.uniform(60, 600)
+                    state = emit(t, guild_id, member_id, state, (channel, False))
+                    t += rng.uniform(2, 30)
+                    state = emit(t, guild_id, member_id, state, (channel, True))
+                emit(max(t + 1, end + rng.uniform(-60, 60)), guild_id, member_id, state, (None, False))
+
+    events.sort(key=lambda event: event['t'])
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(json.dumps({'guilds': configs}, separators=(',', ':')) + '\n')
+        for event in events:
+            f.write(json.dumps(event, separators=(',', ':')) + '\n')
+    return len(events)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('recording', nargs='?', help='recording to replay')
+    parser.add_argument('--synthesize', metavar='PATH',
+                        help='write a synthetic day of meetings to PATH and replay it')
+    parser.add_argument('--guilds', type=int, default=20, help='guilds in a synthetic recording')
+    parser.add_argument('--members', type=int, default=40, help='members per guild in a synthetic recording')
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='simulated latency of every API call in (virtual) seconds')
+    parser.add_argument('--unpaced', action='store_true', help='disable the per-guild API rate limit')
+    parser.add_argument('--warning-mode', choices=docbot.WARNING_MODES,
+                        help='override the recorded per-guild warning mode')
+    parser.add_argument('--mute-strategy', choices=docbot.MUTE_STRATEGIES,
+                        help='override the recorded per-guild mute strategy')
+    parser.add_argument('--camera-grace', type=int, help='override the recorded per-guild camera grace')
+    args = parser.parse_args()
+
+    path = args.recording
+    if args.synthesize:
+        written = synthesize(args.synthesize, args.guilds, args.members)
+        print(f"wrote {written} events to {args.synthesize}")
+        path = args.synthesize
+    if path is None:
+        parser.error('a recording or --synthesize is required')
+    options = {key: value for key, value in (('warning_mode', args.warning_mode),
+                                             ('mute_strategy', args.mute_strategy),
+                                             ('camera_grace', args.camera_grace)) if value is not None}
+
+    loop = VirtualClockLoop()
+    try:
+        events, span, simulated, elapsed, calls = loop.run_until_complete(
+            replay(path, options, args.latency, not args.unpaced))
+    finally:
+        loop.close()
+
+    totals = {field: sum(getattr(stats, field) for stats in docbot.metrics.guilds.values())
+              for field in GuildStats.FIELDS}
+    print(f"== {path} (latency {args.latency * 1000:.0f} ms, {'unpaced' if args.unpaced else 'paced'})")
+    print(f"   events: {events}  recorded span: {span / 3600:,.2f} h  replayed in: {elapsed:,.2f} s  "
+          f"speedup: {simulated / elapsed:,.0f}x  events/sec: {events / elapsed:,.0f}")
+    print(f"   enforcement: {totals}")
+    print(f"   http calls: {calls}")
+    for (kind, outcome), count in sorted(docbot.metrics.actions.items()):
+        histogram = docbot.metrics.action_latency[kind]
+        print(f"   {kind:<20} {outcome:<6} n={count:<7} mean={histogram.sum / histogram.count * 1000:8.1f} ms")
+    print('   virtual-time latency per enforcement stage:')
+    for line in docbot.metrics.stage_report().splitlines():
+        print(f"   {line}")
+
+
+if __name__ == '__main__':
+    main()
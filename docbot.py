@@ -1,11 +1,28 @@
 import discord
+from discord import app_commands
 from discord.ext import commands
 import asyncio
 import json
+import logging
+import time
+from collections import deque, namedtuple
+from datetime import timedelta
+
+from actions import ActionQueue
+from logs import setup_logging
+from metrics import Metrics
+from recorder import VoiceRecorder
+from scheduler import TimerWheel
+from storage import JsonConfigStore, SqliteConfigStore
+from watcher import ConfigWatcher
+
+CONFIG_PATH = 'config.json'
+
+log = logging.getLogger('docbot')
 
 # Load configuration
 try:
-    with open('config.json', 'r') as f:
+    with open(CONFIG_PATH, 'r') as f:
         config = json.load(f)
 except FileNotFoundError:
     config = {
@@ -13,240 +30,1430 @@ except FileNotFoundError:
         'guilds': {}  # { guild_id: { "text_channel_id": id, "voice_channels": [ids] } }
     }
 
-intents = discord.Intents.default()
-intents.voice_states = True
-intents.message_content = True
+# Guild settings live either in config.json (default) or in SQLite when
+# config.json sets "storage": "sqlite"; the guilds of config.json are imported
+# into the database the first time it is created.
+if config.get('storage') == 'sqlite':
+    config_store = SqliteConfigStore(config.get('database', 'docbot.db'), legacy_guilds=config['guilds'])
+else:
+    config_store = JsonConfigStore(CONFIG_PATH, config)
+config['guilds'] = config_store.guilds
+
+# Which admin commands are served: ! prefix commands, slash commands or both.
+# Prefix commands need every message of every guild (message_content), slash
+# commands arrive as interactions and need no message events at all.
+COMMAND_MODES = ('prefix', 'slash', 'both')
+
+def client_options(profile='default', command_mode='prefix'):
+    """Keyword arguments for the bot's client under a runtime profile.
+
+    "default" keeps discord.py's default intents and caches. "lean" only
+    subscribes to what enforcement and the admin commands need, caches
+    members while they are in voice, skips chunking and keeps no message
+    cache, which is what bounds guilds per process on memory. Message
+    events are only subscribed to when ``command_mode`` serves prefix
+    commands.
+    """
+    message_commands = command_mode != 'slash'
+    if profile == 'lean':
+        intents = discord.Intents.none()
+        intents.guilds = True
+        intents.voice_states = True
+        intents.guild_messages = message_commands
+        intents.message_content = message_commands
+        return {
+            'intents': intents,
+            'member_cache_flags': discord.MemberCacheFlags.from_intents(intents),
+            'chunk_guilds_at_startup': False,
+            'max_messages': None,
+        }
+    intents = discord.Intents.default()
+    intents.voice_states = True
+    intents.message_content = message_commands
+    if not message_commands:
+        intents.guild_messages = False
+        intents.dm_messages = False
+    return {'intents': intents}
+
+class DocBot(commands.Bot):
+    metrics_runner = None  # aiohttp runner of the metrics endpoint, if enabled
+    latency_task = None  # periodic enforcement latency dump, if enabled
+
+    async def setup_hook(self):
+        # Writes the config store held back until the loop runs
+        config_store.start()
+        # Register the slash commands with Discord (global commands can take a while to show up)
+        if config.get('command_mode', 'prefix') != 'prefix':
+            await self.tree.sync()
+        # Optional local Prometheus endpoint, enabled by "metrics_port" in config.json
+        if config.get('metrics_port'):
+            self.metrics_runner = await metrics.start_server(config.get('metrics_host', '127.0.0.1'),
+                                                             config['metrics_port'])
+        if recorder is not None:
+            recorder.start(config['guilds'])
+        if config.get('latency_dump_interval', 300):
+            # asyncio only keeps weak references to tasks
+            self.latency_task = asyncio.create_task(dump_latency_stats(config.get('latency_dump_interval', 300)))
 
-bot = commands.Bot(command_prefix='!', intents=intents)
+    async def close(self):
+        if self.latency_task is not None:
+            self.latency_task.cancel()
+            self.latency_task = None
+        # Give buffered and queued API calls a moment, then flush pending
+        # config changes before shutting down
+        flush_warning_messages()
+        try:
+            await asyncio.wait_for(action_queue.join(), SHUTDOWN_GRACE)
+        except asyncio.TimeoutError:
+            pass
+        if config_watcher is not None:
+            config_watcher.stop()
+        await config_store.close()
+        if recorder is not None:
+            recorder.stop()
+        if self.metrics_runner is not None:
+            await self.metrics_runner.cleanup()
+            self.metrics_runner = None
+        await super().close()
+
+bot = DocBot(command_prefix='!', **client_options(config.get('profile', 'default'),
+                                                  config.get('command_mode', 'prefix')))
 bot.remove_command('help')  # Remove default help command
 
-# Store warnings per guild: { guild_id: { user_id: {"warning_msg": <Message>, "timer": <Task>} } }
+WARNING_DELAY = 120  # seconds a member has to turn their camera on
+DIGEST_WINDOW = 5  # seconds warnings are gathered for in "digest" warning mode
+DIGEST_MAX_MENTIONS = 75  # members mentioned in a digest message, keeps it under the message size limit
+SURGE_JOINS = 20  # joins into one channel within SURGE_WINDOW that start a surge
+SURGE_WINDOW = 10  # seconds; a surge ends this long after the join rate drops again
+BOARD_INTERVAL = 10  # minimum seconds between status board edits in "board" warning mode
+BOARD_MAX_LINES = 40  # members listed on a status board, keeps it under the message size limit
+BULK_DELETE_SIZE = 100  # resolved warning messages per bulk delete (Discord's maximum)
+BULK_DELETE_AGE = 5  # seconds a resolved warning message may wait for its bulk delete
+BULK_DELETE_MAX_AGE = timedelta(days=14, minutes=-5)  # older messages must be deleted one by one
+SHUTDOWN_GRACE = 5  # seconds queued API calls may take to finish on shutdown
+RECONCILE_CONCURRENCY = 10  # guilds reconciled at once, keeps startup under the global rate limit
+MUTE_BATCH_WINDOW = 2  # seconds Speak exemption changes are gathered for in "channel" mute strategy
+MAX_CAMERA_GRACE = 60  # upper bound for the per-guild camera-off grace period
+
+# How warnings are posted: one message per member, one shared message per
+# warning channel and DIGEST_WINDOW, or a single status board per guild
+WARNING_MODES = ('message', 'digest', 'board')
+
+# How members with their camera off are kept quiet: a server mute per member,
+# or a Speak deny on the monitored channel with per-member exemptions for
+# everyone with their camera on, written in batches of MUTE_BATCH_WINDOW
+MUTE_STRATEGIES = ('member', 'channel')
+
+class WarningRecord:
+    """A pending warning, held as IDs so no Discord objects stay alive until its deadline.
+
+    ``message_id`` and ``deadline`` are None until the warning message is
+    posted; ``shared`` is the WarningDigest or StatusBoard listing the
+    member, if any.
+    """
+
+    __slots__ = ('guild_id', 'member_id', 'channel_id', 'message_id', 'deadline', 'shared')
+
+    def __init__(self, guild_id, member_id, channel_id, message_id=None, deadline=None, shared=None):
+        self.guild_id = guild_id
+        self.member_id = member_id
+        self.channel_id = channel_id
+        self.message_id = message_id
+        self.deadline = deadline
+        self.shared = shared
+
+# Store warnings per guild: { guild_id (int): { user_id: WarningRecord } }
 guild_warnings = {}
+warnings_restored = False
+
+# Optional recording of every handled voice update, for benchmarks/replay.py
+recorder = VoiceRecorder(config['voice_recording']) if config.get('voice_recording') else None
+
+# Enforcement counters and API call stats served on the metrics endpoint
+metrics = Metrics(max_guild_labels=config.get('metrics_guild_labels', 100))
+
+# Latency from a voice event to each enforcement stage: policy lookup, end of
+# the handler, member muted, warning posted and kick deadline registered
+stage_lookup = metrics.stage('lookup')
+stage_handler = metrics.stage('handler')
+stage_mute = metrics.stage('mute')
+stage_warn_post = metrics.stage('warn_post')
+stage_timer = metrics.stage('timer')
+
+# Compiled, read-only view of a guild's config used on the voice event hot path;
+# "stats" is the guild's (mutable) GuildStats counters
+GuildPolicy = namedtuple('GuildPolicy', 'voice_channels text_channel_id text_channel enforced warning_mode '
+                                         'camera_grace mute_strategy stats')
+
+# Compiled policies per guild: { guild_id (int): GuildPolicy }
+guild_policies = {}
+
+def compile_policy(guild_id, guild_config):
+    """Build an immutable GuildPolicy from a guild's config entry."""
+    voice_channels = frozenset(guild_config.get('voice_channels', []))
+    text_channel_id = guild_config.get('text_channel_id')
+    text_channel = bot.get_channel(text_channel_id) if text_channel_id else None
+    return GuildPolicy(
+        voice_channels=voice_channels,
+        text_channel_id=text_channel_id,
+        text_channel=text_channel,
+        enforced=bool(voice_channels and text_channel_id),
+        warning_mode=guild_config.get('warning_mode', 'message'),
+        camera_grace=guild_config.get('camera_grace', 0),
+        mute_strategy=guild_config.get('mute_strategy', 'member'),
+        stats=metrics.guild(guild_id),
+    )
+
+def rebuild_policies(guild_id_str=None):
+    """Recompile one guild's policy, or every guild's when no ID is given."""
+    if guild_id_str is None:
+        guild_policies.clear()
+        for gid, guild_config in config['guilds'].items():
+            guild_policies[int(gid)] = compile_policy(int(gid), guild_config)
+    elif guild_id_str in config['guilds']:
+        guild_policies[int(guild_id_str)] = compile_policy(int(guild_id_str), config['guilds'][guild_id_str])
+    else:
+        guild_policies.pop(int(guild_id_str), None)
+
+rebuild_policies()
 
 @bot.event
 async def on_ready():
-    print(f'{bot.user} has connected to Discord!')
+    # Channels can only be resolved once the cache is populated
+    rebuild_policies()
+    warning_timers.start()
+    grace_timers.start()
+    if config_watcher is not None:
+        config_watcher.start()
+
+    global warnings_restored
+    if not warnings_restored:
+        warnings_restored = True
+        restore_warnings()
+    start_reconcile()
+    log.info('%s has connected to Discord!', bot.user)
+
+@bot.event
+async def on_resumed():
+    # Voice updates may have been missed while the gateway was disconnected
+    start_reconcile()
 
 @bot.event
 async def on_voice_state_update(member, before, after):
     """Monitors voice state changes for camera off/on handling."""
-    guild_id_str = str(member.guild.id)
-    
-    # Skip if guild not configured or if it's a bot account
-    if guild_id_str not in config['guilds'] or member.bot:
+    # Only the channel, the camera and the server mute matter for enforcement,
+    # so self-mute/deafen, streaming and suppress toggles (most events in busy
+    # guilds) stop here. Both states hold the same cached channel object.
+    if before.channel is after.channel and before.self_video == after.self_video and before.mute == after.mute:
         return
+    started = time.perf_counter()
+    guild_id = member.guild.id
+    policy = guild_policies.get(guild_id)
 
-    # Ensure a warnings dict exists for this guild
-    if guild_id_str not in guild_warnings:
-        guild_warnings[guild_id_str] = {}
+    # Skip if guild not configured (or missing channels) or if it's a bot account
+    if policy is None or not policy.enforced:
+        return
+    if member.bot:
+        # Bots (music, recording) are never muted, so they follow no channel's Speak deny either
+        if before.channel is not after.channel:
+            grant_speak(guild_id, member)
+        return
+    if recorder is not None:
+        recorder.record(guild_id, member.id, before, after)
+    policy.stats.voice_events += 1
+    stage_lookup.observe(time.perf_counter() - started)
 
-    guild_config = config['guilds'][guild_id_str]
-    voice_channels = guild_config.get('voice_channels', [])
-    text_channel_id = guild_config.get('text_channel_id')
+    # Check if the channels are ones we're monitoring
+    voice_channels = policy.voice_channels
+    in_before = before.channel is not None and before.channel.id in voice_channels
+    in_after = after.channel is not None and after.channel.id in voice_channels
+    if not in_before and not in_after:
+        if after.channel is not None and member.id in bot_mutes.get(guild_id, ()):
+            # Back in voice after leaving while still muted by the bot
+            set_mute(guild_id, member, False)
+        return
+    if in_after and (before.channel is None or before.channel.id != after.channel.id):
+        record_join(guild_id, after.channel.id)
+
+    # Post the update to the member's mailbox; updates queued in the same
+    # loop iteration collapse into the latest one
+    key = (guild_id, member.id)
+    queued = member_mailbox.get(key)
+    member_mailbox[key] = (member, in_after, after.self_video, queued[3] if queued is not None else started)
+    global mailbox_scheduled
+    if not mailbox_scheduled:
+        mailbox_scheduled = True
+        asyncio.get_running_loop().call_soon(process_member_updates)
+
+    stage_handler.observe(time.perf_counter() - started)
+
+class JoinRate:
+    """Sliding-window join counter of one monitored channel.
+
+    The channel is in a surge while SURGE_JOINS joins fit within
+    SURGE_WINDOW seconds, and for SURGE_WINDOW seconds after the last join
+    that kept it there.
+    """
+
+    __slots__ = ('joins', 'surge_until')
+
+    def __init__(self):
+        self.joins = deque(maxlen=SURGE_JOINS)  # monotonic() of the latest joins
+        self.surge_until = 0.0
+
+    def join(self, now):
+        """Record a join. Returns True if it started a surge."""
+        self.joins.append(now)
+        if len(self.joins) < SURGE_JOINS or now - self.joins[0] > SURGE_WINDOW:
+            return False
+        started = now >= self.surge_until
+        self.surge_until = now + SURGE_WINDOW
+        return started
+
+    def surging(self, now):
+        return now < self.surge_until
+
+# { (guild_id, channel_id): JoinRate } of monitored channels members joined
+join_rates = {}
+
+def record_join(guild_id, channel_id):
+    key = (guild_id, channel_id)
+    rate = join_rates.get(key)
+    if rate is None:
+        rate = join_rates[key] = JoinRate()
+    if rate.join(time.monotonic()):
+        log.info('Join surge, batching warnings', extra={'guild_id': guild_id, 'channel_id': channel_id})
+
+def in_surge(guild_id, member):
+    """Whether the member's voice channel is going through a join surge."""
+    voice = member.voice
+    if voice is None or voice.channel is None:
+        return False
+    rate = join_rates.get((guild_id, voice.channel.id))
+    return rate is not None and rate.surging(time.monotonic())
+
+# Tracked member states. Members outside monitored channels are untracked.
+MEMBER_PENDING = 'pending'  # camera off for less than the guild's camera grace period
+MEMBER_WARNED = 'warned'  # muted with their camera off, warning pending
+MEMBER_COMPLIANT = 'compliant'  # in a monitored channel with their camera on
+MEMBER_KICKED = 'kicked'  # deadline expired, waiting for the kick to land
+
+# { guild_id (int): { member_id: state } }
+member_states = {}
+
+# Latest unprocessed voice update per member:
+# { (guild_id, member_id): (member, in_monitored, self_video, started) }
+member_mailbox = {}
+mailbox_scheduled = False
+
+def process_member_updates():
+    """Drain the mailbox, moving each member's state machine to its latest voice state."""
+    global mailbox_scheduled
+    mailbox_scheduled = False
+    while member_mailbox:
+        key = next(iter(member_mailbox))
+        member, in_monitored, self_video, started = member_mailbox.pop(key)
+        try:
+            update_member_state(key[0], member, in_monitored, self_video, started)
+        except Exception:
+            # One bad update must not strand everyone else's in the mailbox
+            log.exception('Failed to apply voice update', extra={'guild_id': key[0], 'member_id': key[1]})
+
+def update_member_state(guild_id, member, in_monitored, self_video, started=None):
+    """Apply one (merged) voice update to a member's state machine."""
+    states = member_states.get(guild_id)
+    if states is None:
+        states = member_states[guild_id] = {}
+    if guild_id not in guild_warnings:
+        guild_warnings[guild_id] = {}
+    state = states.get(member.id)
 
-    # Skip if no channels configured
-    if not voice_channels or not text_channel_id:
+    # --- Left the monitored channels ---
+    if not in_monitored:
+        if state is not None:
+            del states[member.id]
+            if state == MEMBER_PENDING:
+                grace_timers.cancel((guild_id, member.id))
+            cancel_warning(member, guild_id)
+            revoke_speak(guild_id, member.id)
+        # A server mute follows the member out of the channel
+        set_mute(guild_id, member, False)
         return
 
-    text_channel = bot.get_channel(text_channel_id)
+    if state == MEMBER_KICKED:
+        return
 
-    # Check if the channel is one we're monitoring
-    is_monitored_channel = lambda channel: channel and channel.id in voice_channels
+    # --- Camera on ---
+    if self_video:
+        if state == MEMBER_PENDING:
+            # Came back within the grace period, nothing was sent
+            grace_timers.cancel((guild_id, member.id))
+        elif member.id in guild_warnings[guild_id]:
+            cancel_warning(member, guild_id)
+        grant_speak(guild_id, member)
+        set_mute(guild_id, member, False)
+        states[member.id] = MEMBER_COMPLIANT
+        return
 
-    # --- Join designated voice channel ---
-    if is_monitored_channel(after.channel):
-        if member.voice and not after.mute:
-            try:
-                await member.edit(mute=True)
-            except discord.errors.HTTPException:
-                print(f"Failed to mute {member.name} in {member.guild.name}")
-        
-        if not after.self_video:
-            await send_warning(member, text_channel, guild_id_str)
-
-    # --- Leave designated voice channel ---
-    elif is_monitored_channel(before.channel) and not is_monitored_channel(after.channel):
-        await cancel_warning(member, guild_id_str)
-
-    # --- Turn camera on in designated channel ---
-    if (is_monitored_channel(before.channel)
-        and not before.self_video
-        and after.self_video
-    ):
-        if member.id in guild_warnings[guild_id_str]:
-            await cancel_warning(member, guild_id_str)
-            if member.voice:
-                try:
-                    await member.edit(mute=False)
-                except discord.errors.HTTPException:
-                    print(f"Failed to unmute {member.name} in {member.guild.name}")
-
-    # --- Turn camera off in designated channel ---
-    if (is_monitored_channel(before.channel)
-        and before.self_video
-        and not after.self_video
-    ):
-        await send_warning(member, text_channel, guild_id_str)
-
-async def send_warning(member, text_channel, guild_id_str):
+    # --- Camera off (joined, or turned it off) ---
+    if state == MEMBER_PENDING:
+        return
+    policy = guild_policies.get(guild_id)
+    if state == MEMBER_WARNED and member.id in guild_warnings[guild_id]:
+        if policy is not None and policy.mute_strategy == 'channel':
+            # May have moved to another monitored channel, which must deny Speak too
+            mute_camera_off(guild_id, member)
+        return
+    if policy is None or not policy.enforced:
+        return
+    if policy.camera_grace and state == MEMBER_COMPLIANT:
+        # Only a camera that stays off past the grace period gets a warning
+        states[member.id] = MEMBER_PENDING
+        grace_timers.schedule((guild_id, member.id), time.time() + policy.camera_grace)
+        return
+    enforce_camera_off(guild_id, member, started)
+
+def enforce_camera_off(guild_id, member, started=None):
+    """Mute a member with their camera off and warn them."""
+    policy = guild_policies[guild_id]
+    text_channel = policy.text_channel or bot.get_channel(policy.text_channel_id)
+    if text_channel is None:
+        # No mute without a warning and a deadline; the next update tries again
+        log.warning('Warning channel not found, not enforcing',
+                    extra={'guild_id': guild_id, 'channel_id': policy.text_channel_id})
+        member_states[guild_id].pop(member.id, None)
+        return
+    mute_camera_off(guild_id, member, started)
+    send_warning(member, text_channel, guild_id, started)
+    member_states[guild_id][member.id] = MEMBER_WARNED
+
+def mute_camera_off(guild_id, member, started=None):
+    """Mute a member through the guild's mute strategy (a no-op if already muted that way)."""
+    if guild_policies[guild_id].mute_strategy == 'channel':
+        voice = member.voice
+        revoke_speak(guild_id, member.id, voice.channel.id if voice is not None and voice.channel else None)
+    else:
+        set_mute(guild_id, member, True, started)
+
+async def grace_expired(expired):
+    """Warn members whose camera stayed off for their guild's whole grace period."""
+    for guild_id, member_id in expired:
+        states = member_states.get(guild_id, {})
+        if states.get(member_id) != MEMBER_PENDING:
+            continue
+        guild = bot.get_guild(guild_id)
+        policy = guild_policies.get(guild_id)
+        member = guild.get_member(member_id) if guild else None
+        voice = member.voice if member else None
+        if (policy is None or not policy.enforced or voice is None or voice.channel is None
+                or voice.channel.id not in policy.voice_channels):
+            del states[member_id]
+            continue
+        if voice.self_video:
+            states[member_id] = MEMBER_COMPLIANT
+            continue
+        enforce_camera_off(guild_id, member)
+
+# Server mutes the bot applied itself: { guild_id (int): { member_id } }.
+# Only these are ever lifted, so mutes set by moderators are left alone.
+bot_mutes = {}
+for _guild_id, _member_id in config_store.load_mutes():
+    bot_mutes.setdefault(_guild_id, set()).add(_member_id)
+
+def queued_mute(guild_id, member_id):
+    """The mute state the bot's queued or running edits will leave a member in, or None."""
+    for check in (action_queue.is_pending, action_queue.in_flight):
+        if check(guild_id, (member_id, 'mute')):
+            return True
+        if check(guild_id, (member_id, 'unmute')):
+            return False
+    return None
+
+def set_mute(guild_id, member, mute, started=None):
+    """Server-mute a member, or lift a mute the bot applied.
+
+    Nothing is queued when the member already is (or is about to be) in the
+    wanted state, judged by their live voice state and the bot's queued and
+    running edits, or was muted by someone else. A queued opposite edit
+    cancels out instead. The bot keeps its claim on a mute until the unmute
+    has landed, and a member who left voice can only be unmuted once back,
+    so their mute stays tracked until then. ``started`` is the perf_counter()
+    of the triggering voice event, used to record how long the member took
+    to actually be muted.
+    """
+    owned = bot_mutes.get(guild_id)
+    voice = getattr(member, 'voice', None)
+    if mute:
+        planned = queued_mute(guild_id, member.id)
+        if planned is None:
+            planned = voice is not None and voice.mute
+        if planned:
+            return
+        if voice is None and owned is not None and member.id in owned:
+            # Mute again once back in voice if someone lifted it since
+            return
+        claim_mute(guild_id, member.id)
+        kind, opposite = 'mute', 'unmute'
+    else:
+        if not owned or member.id not in owned:
+            return
+        discarded = action_queue.discard(guild_id, (member.id, 'mute'))
+        planned = queued_mute(guild_id, member.id)
+        if voice is None or voice.channel is None:
+            if discarded and planned is None:
+                release_mute(guild_id, member.id)
+            return
+        if planned is False:
+            # The unmute already on its way releases the mute
+            return
+        if not planned and not voice.mute:
+            release_mute(guild_id, member.id)
+            return
+        kind, opposite = 'unmute', 'mute'
+
+    async def edit():
+        await member.edit(mute=mute)
+        if mute:
+            if started is not None:
+                stage_mute.observe(time.perf_counter() - started)
+        elif not action_queue.is_pending(guild_id, (member.id, 'mute')):
+            release_mute(guild_id, member.id)
+
+    def failed():
+        release_mute(guild_id, member.id)
+
+    # A failed unmute leaves the mute tracked, so a later update or reconcile lifts it
+    action_queue.enqueue(guild_id, (member.id, kind), edit, cancels=(member.id, opposite),
+                         on_failure=failed if mute else None)
+
+def claim_mute(guild_id, member_id):
+    """Start tracking a mute as the bot's."""
+    owned = bot_mutes.setdefault(guild_id, set())
+    if member_id not in owned:
+        owned.add(member_id)
+        config_store.save_mute(guild_id, member_id)
+
+def release_mute(guild_id, member_id):
+    """Stop tracking a mute of the bot's."""
+    owned = bot_mutes.get(guild_id)
+    if owned is not None and member_id in owned:
+        owned.discard(member_id)
+        if not owned:
+            del bot_mutes[guild_id]
+        config_store.delete_mute(guild_id, member_id)
+
+class SpeakOverwrites:
+    """Speak exemptions of one monitored voice channel in "channel" mute strategy.
+
+    The channel denies Speak to @everyone, so members are muted by joining
+    it; members with their camera on get a member overwrite allowing Speak.
+    Changes are collected for MUTE_BATCH_WINDOW seconds and written with one
+    channel edit, whatever the number of members involved. Only exemptions
+    the bot wrote itself are ever replaced; other overwrites, Speak-only ones
+    set by moderators included, are left as they are. What the bot wrote and
+    the @everyone Speak value it replaced are saved in the guild's
+    "speak_overwrites" option, so the channel can be restored once it is no
+    longer managed (see release_speak_overwrites).
+    """
+
+    def __init__(self, guild_id, channel_id):
+        self.guild_id = guild_id
+        self.channel_id = channel_id
+        self.allowed = set()  # member IDs exempted
+        self.synced = False  # channel overwrites match ``allowed``
+        self.scheduled = False
+        self.handle = None
+        saved = config['guilds'].get(str(guild_id), {}).get('speak_overwrites', {}).get(str(channel_id))
+        self.denied = saved is not None  # the @everyone Speak deny is in place
+        self.everyone_speak = saved['everyone'] if saved else None  # @everyone Speak value before the deny
+        self.written = set(saved['members']) if saved else set()  # exemptions in the channel
+
+    def grant(self, member_id):
+        if member_id not in self.allowed:
+            self.allowed.add(member_id)
+            self.touch()
+
+    def revoke(self, member_id):
+        if member_id in self.allowed:
+            self.allowed.discard(member_id)
+            self.touch()
+        elif not self.synced:
+            # The @everyone deny may not be in place yet
+            self.touch()
+
+    def touch(self):
+        self.synced = False
+        if self.scheduled:
+            return
+        self.scheduled = True
+        self.handle = asyncio.get_running_loop().call_later(MUTE_BATCH_WINDOW, self._queue_update)
+
+    def _queue_update(self):
+        self.scheduled = False
+        action_queue.enqueue(self.guild_id, (self.channel_id, 'overwrites'), self.update)
+
+    def foreign_overwrites(self, channel):
+        """The channel's overwrites without the exemptions the bot wrote."""
+        exemption = discord.PermissionOverwrite(speak=True)
+        return {target: overwrite for target, overwrite in channel.overwrites.items()
+                if not (target.id in self.written and overwrite == exemption)}
+
+    async def update(self):
+        channel = bot.get_channel(self.channel_id)
+        if channel is None or self.synced:
+            return
+        overwrites = self.foreign_overwrites(channel)
+        everyone = channel.guild.default_role
+        current = overwrites.get(everyone) or discord.PermissionOverwrite()
+        everyone_speak = self.everyone_speak if self.denied else current.speak
+        deny = discord.PermissionOverwrite.from_pair(*current.pair())
+        deny.speak = False
+        overwrites[everyone] = deny
+        # Members with an overwrite of someone else's keep it as it is
+        written = self.allowed - {target.id for target in overwrites}
+        for member_id in written:
+            overwrites[discord.Object(member_id, type=discord.Member)] = discord.PermissionOverwrite(speak=True)
+
+        self.synced = True
+        try:
+            await channel.edit(overwrites=overwrites)
+        except Exception:
+            # Let the action queue's retry write them
+            self.synced = False
+            raise
+        self.denied, self.everyone_speak, self.written = True, everyone_speak, written
+        await save_speak_overwrites(self.guild_id, self.channel_id,
+                                    {'everyone': everyone_speak, 'members': sorted(written)})
+
+    async def restore(self):
+        """Remove the bot's exemptions and put back the @everyone Speak value it replaced."""
+        channel = bot.get_channel(self.channel_id)
+        if channel is not None and (self.denied or self.written):
+            overwrites = self.foreign_overwrites(channel)
+            everyone = channel.guild.default_role
+            current = overwrites.get(everyone)
+            if self.denied and current is not None:
+                restored = discord.PermissionOverwrite.from_pair(*current.pair())
+                restored.speak = self.everyone_speak
+                if restored.is_empty():
+                    del overwrites[everyone]
+                else:
+                    overwrites[everyone] = restored
+            await channel.edit(overwrites=overwrites)
+        await save_speak_overwrites(self.guild_id, self.channel_id, None)
+
+async def save_speak_overwrites(guild_id, channel_id, entry):
+    """Persist what the bot wrote to a channel's overwrites, or forget it (``entry`` None)."""
+    guild_config = config['guilds'].get(str(guild_id))
+    if guild_config is None:
+        return
+    saved = dict(guild_config.get('speak_overwrites', {}))
+    if entry is None:
+        if saved.pop(str(channel_id), None) is None:
+            return
+    elif saved.get(str(channel_id)) == entry:
+        return
+    else:
+        saved[str(channel_id)] = entry
+    await config_store.set_option(str(guild_id), 'speak_overwrites', saved)
+
+# Speak exemptions per monitored channel in "channel" mute strategy: { guild_id: { channel_id: SpeakOverwrites } }
+speak_overwrites = {}
+
+def grant_speak(guild_id, member):
+    """Exempt a member from their channel's Speak deny (and no other channel's).
+
+    Returns False if the guild mutes members individually instead.
+    """
+    policy = guild_policies.get(guild_id)
+    if policy is None or policy.mute_strategy != 'channel':
+        return False
+    voice = member.voice
+    channel_id = voice.channel.id if voice is not None and voice.channel is not None else None
+    channels = speak_overwrites.setdefault(guild_id, {})
+    for other in channels.values():
+        if other.channel_id != channel_id:
+            other.revoke(member.id)
+    if channel_id in policy.voice_channels:
+        if channel_id not in channels:
+            channels[channel_id] = SpeakOverwrites(guild_id, channel_id)
+        channels[channel_id].grant(member.id)
+    return True
+
+def release_speak_overwrites(guild_id):
+    """Restore the guild's channels that are no longer muted through overwrites.
+
+    That is every channel once the guild leaves "channel" mute strategy, and
+    any channel no longer monitored. Channels the bot changed before a
+    restart are found through the saved "speak_overwrites" option.
+    """
+    policy = guild_policies.get(guild_id)
+    managed = frozenset()
+    if policy is not None and policy.enforced and policy.mute_strategy == 'channel':
+        managed = policy.voice_channels
+    channels = speak_overwrites.get(guild_id, {})
+    saved = config['guilds'].get(str(guild_id), {}).get('speak_overwrites', {})
+    for channel_id in {*channels, *map(int, saved)} - managed:
+        overwrites = channels.pop(channel_id, None) or SpeakOverwrites(guild_id, channel_id)
+        if overwrites.scheduled:
+            overwrites.handle.cancel()
+            overwrites.scheduled = False
+        action_queue.enqueue(guild_id, (channel_id, 'overwrites'), overwrites.restore)
+    if not channels:
+        speak_overwrites.pop(guild_id, None)
+
+def revoke_speak(guild_id, member_id, channel_id=None):
+    """Withdraw a member's Speak exemptions in the guild, if any.
+
+    Passing the member's ``channel_id`` makes sure that channel denies Speak
+    even if nobody was ever exempted there.
+    """
+    channels = speak_overwrites.get(guild_id)
+    if channel_id is not None:
+        if channels is None:
+            channels = speak_overwrites[guild_id] = {}
+        if channel_id not in channels:
+            channels[channel_id] = SpeakOverwrites(guild_id, channel_id)
+    for channel in (channels or {}).values():
+        channel.revoke(member_id)
+
+def delete_message(guild_id, message):
+    """Buffer a resolved warning message for bulk deletion in its channel."""
+    channel = message.channel
+    buffered = deletion_buffers.get(channel.id)
+    if buffered is None:
+        handle = asyncio.get_running_loop().call_later(BULK_DELETE_AGE, flush_deletions, guild_id, channel.id)
+        buffered = deletion_buffers[channel.id] = ([], handle)
+    buffered[0].append(message)
+    if len(buffered[0]) >= BULK_DELETE_SIZE:
+        flush_deletions(guild_id, channel.id)
+
+def flush_deletions(guild_id, channel_id):
+    """Queue one bulk deletion for everything buffered in a channel."""
+    buffered = deletion_buffers.pop(channel_id, None)
+    if buffered is None:
+        return
+    messages, handle = buffered
+    handle.cancel()
+    action_queue.enqueue(guild_id, (messages[0].id, 'delete'), lambda: bulk_delete(messages))
+
+async def bulk_delete(messages):
+    """Delete messages of one channel, in bulk where Discord allows it.
+
+    Bulk deletion needs Manage Messages; without it the bot's own messages
+    are deleted one by one, which needs no permission.
+    """
+    channel = messages[0].channel
+    # Bulk deletion only accepts messages younger than 14 days
+    cutoff = discord.utils.time_snowflake(discord.utils.utcnow() - BULK_DELETE_MAX_AGE)
+    single = [message for message in messages if message.id <= cutoff]
+    recent = [message for message in messages if message.id > cutoff]
+    if len(recent) > 1 and channel.permissions_for(channel.guild.me).manage_messages:
+        try:
+            await channel.delete_messages(recent)
+            recent = []
+        except discord.errors.Forbidden:
+            pass
+    for message in single + recent:
+        try:
+            await message.delete()
+        except discord.errors.NotFound:
+            pass
+
+def warning_text(mentions):
+    return f"⚠️ {mentions}, please turn on your camera within 2 minutes or you will be kicked!"
+
+def digest_text(mentions):
+    """Warning text of a digest, mentioning at most DIGEST_MAX_MENTIONS members."""
+    mentions = list(mentions)
+    text = ' '.join(mentions[:DIGEST_MAX_MENTIONS])
+    if len(mentions) > DIGEST_MAX_MENTIONS:
+        text += f" …and {len(mentions) - DIGEST_MAX_MENTIONS} more"
+    return warning_text(text)
+
+def send_warning(member, text_channel, guild_id, started=None):
     """Warn user to turn camera on within 2 minutes or be kicked."""
-    if member.id in guild_warnings[guild_id_str]:
+    if member.id in guild_warnings[guild_id]:
         # Already warned
         return
 
-    try:
-        warning_msg = await text_channel.send(
-            f"⚠️ {member.mention}, please turn on your camera within 2 minutes or you will be kicked!"
-        )
-        guild_warnings[guild_id_str][member.id] = {
-            'warning_msg': warning_msg,
-            'timer': asyncio.create_task(kick_after_delay(member, warning_msg, guild_id_str))
-        }
-    except discord.errors.HTTPException as e:
-        print(f"Failed to send warning message in {member.guild.name}: {e}")
+    policy = guild_policies[guild_id]
+    policy.stats.warnings += 1
+    warning_mode = policy.warning_mode
+    if warning_mode == 'message' and in_surge(guild_id, member):
+        # Meeting start: group warnings of up to DIGEST_MAX_MENTIONS members with
+        # a shared deadline instead of a message per member; mutes are already
+        # paced in join order
+        warning_mode = 'digest'
+    if warning_mode == 'board':
+        board = get_status_board(guild_id, text_channel)
+        deadline = time.time() + WARNING_DELAY
+        guild_warnings[guild_id][member.id] = WarningRecord(guild_id, member.id, text_channel.id,
+                                                            deadline=deadline, shared=board)
+        warning_timers.schedule((guild_id, member.id), deadline)
+        if started is not None:
+            stage_timer.observe(time.perf_counter() - started)
+        config_store.save_warning(guild_id, member.id, text_channel.id, board.message_id, deadline)
+        board.touch()
+        return
 
-async def cancel_warning(member, guild_id_str):
+    if warning_mode == 'digest':
+        digest = open_digests.get(text_channel.id)
+        if digest is None:
+            digest = open_digests[text_channel.id] = WarningDigest(guild_id, text_channel, started=started)
+            asyncio.get_running_loop().call_later(DIGEST_WINDOW, close_digest, digest)
+        digest.members[member.id] = member.mention
+        guild_warnings[guild_id][member.id] = WarningRecord(guild_id, member.id, text_channel.id, shared=digest)
+        if len(digest.members) >= DIGEST_MAX_MENTIONS:
+            # Full: post it now, the next warning opens another message
+            close_digest(digest)
+        return
+
+    # Register the warning right away so concurrent events can't double-post;
+    # the message and the deadline are filled in once the message is sent.
+    member_id, mention = member.id, member.mention
+    entry = guild_warnings[guild_id][member_id] = WarningRecord(guild_id, member_id, text_channel.id)
+
+    async def post():
+        warning_msg = await text_channel.send(warning_text(mention))
+        if started is not None:
+            stage_warn_post.observe(time.perf_counter() - started)
+        if guild_warnings.get(guild_id, {}).get(member_id) is not entry:
+            # Cancelled while the message was in flight
+            delete_message(guild_id, warning_msg)
+            return
+        deadline = entry.deadline = time.time() + WARNING_DELAY
+        entry.message_id = warning_msg.id
+        warning_timers.schedule((guild_id, member_id), deadline)
+        if started is not None:
+            stage_timer.observe(time.perf_counter() - started)
+        config_store.save_warning(guild_id, member_id, text_channel.id, warning_msg.id, deadline)
+
+    def failed():
+        if guild_warnings.get(guild_id, {}).get(member_id) is entry:
+            del guild_warnings[guild_id][member_id]
+            # Let the next voice update or reconcile warn them again
+            states = member_states.get(guild_id, {})
+            if states.get(member_id) == MEMBER_WARNED:
+                del states[member_id]
+
+    action_queue.enqueue(guild_id, (member_id, 'warn'), post, on_failure=failed, not_found_ok=False)
+
+def cancel_warning(member, guild_id):
     """Cancel a user's active warning in a given guild."""
-    if guild_id_str not in guild_warnings or member.id not in guild_warnings[guild_id_str]:
+    entry = guild_warnings.get(guild_id, {}).pop(member.id, None)
+    if entry is None:
         return
 
-    try:
-        guild_warnings[guild_id_str][member.id]['timer'].cancel()
-    except Exception:
-        pass
+    warning_timers.cancel((guild_id, member.id))
+    config_store.delete_warning(guild_id, member.id)
+    metrics.guild(guild_id).cancellations += 1
 
-    warning_msg = guild_warnings[guild_id_str][member.id].get('warning_msg')
-    if warning_msg:
-        try:
-            await warning_msg.delete()
-        except (discord.errors.NotFound, discord.errors.HTTPException):
-            pass
+    # A warning that was never sent needs no cleanup
+    if entry.shared is None and action_queue.discard(guild_id, (member.id, 'warn')):
+        return
+    release_warning_message(guild_id, member.id, entry)
 
-    try:
-        del guild_warnings[guild_id_str][member.id]
-    except KeyError:
-        pass
+def release_warning_message(guild_id, member_id, entry):
+    """Take a resolved member off their warning message."""
+    if entry.shared is not None:
+        entry.shared.resolve(member_id)
+    elif entry.message_id:
+        channel = bot.get_channel(entry.channel_id)
+        if channel is not None:
+            delete_message(guild_id, channel.get_partial_message(entry.message_id))
 
-async def kick_after_delay(member, warning_msg, guild_id_str):
-    """Wait for 2 minutes. If user still has camera off, kick them from voice."""
-    try:
-        await asyncio.sleep(120)
-        # If user is still in the warnings dict, they haven't turned on camera
-        if (guild_id_str in guild_warnings 
-            and member.id in guild_warnings[guild_id_str]):
-            voice_channels = config['guilds'][guild_id_str].get('voice_channels', [])
-            
-            for channel_id in voice_channels:
-                channel = bot.get_channel(channel_id)
-                if member.voice and member.voice.channel == channel:
-                    try:
-                        await member.move_to(None)  # Kick from channel
-                    except discord.errors.HTTPException:
-                        print(f"Failed to kick {member.name} in {member.guild.name}")
-
-            # Remove warning message
-            try:
-                await warning_msg.delete()
-            except (discord.errors.NotFound, discord.errors.HTTPException):
-                pass
+class WarningDigest:
+    """One warning message shared by everyone warned in a channel within DIGEST_WINDOW.
+
+    The message is edited as members comply or are kicked and deleted once
+    the last pending member is resolved.
+    """
+
+    def __init__(self, guild_id, channel, message=None, started=None):
+        self.guild_id = guild_id
+        self.channel = channel
+        self.started = started  # perf_counter() of the event that opened the digest
+        self.members = {}  # { member_id: mention } still pending
+        self.message = message
+        self.closed = message is not None  # no new members once posting started
+        self.stale = False  # members resolved while the message was being posted
+
+    async def post(self):
+        if not self.members:
+            return
+        message = await self.channel.send(digest_text(self.members.values()))
+        self.message = self.channel.get_partial_message(message.id)
+        if self.started is not None:
+            stage_warn_post.observe(time.perf_counter() - self.started)
+
+        deadline = time.time() + WARNING_DELAY
+        warnings = guild_warnings.get(self.guild_id, {})
+        for member_id in self.members:
+            warnings[member_id].deadline = deadline
+            warning_timers.schedule((self.guild_id, member_id), deadline)
+            config_store.save_warning(self.guild_id, member_id, self.channel.id, self.message.id, deadline)
+        if self.started is not None:
+            stage_timer.observe(time.perf_counter() - self.started)
+
+        if not self.members:
+            delete_message(self.guild_id, self.message)
+        elif self.stale:
+            self.refresh()
+
+    def failed(self):
+        # Untrack everyone so the next voice update or reconcile warns them again
+        warnings = guild_warnings.get(self.guild_id, {})
+        states = member_states.get(self.guild_id, {})
+        for member_id in self.members:
+            entry = warnings.get(member_id)
+            if entry is not None and entry.shared is self:
+                del warnings[member_id]
+                if states.get(member_id) == MEMBER_WARNED:
+                    del states[member_id]
+        self.members.clear()
+
+    def resolve(self, member_id):
+        if self.members.pop(member_id, None) is None:
+            return
+        if self.message is None:
+            self.stale = self.closed
+        elif self.members:
+            self.refresh()
+        else:
+            action_queue.discard(self.guild_id, (self.message.id, 'edit'))
+            delete_message(self.guild_id, self.message)
+
+    def refresh(self):
+        """Queue an edit of the message; queued edits collapse into one."""
+        action_queue.enqueue(self.guild_id, (self.message.id, 'edit'), self._edit)
+
+    async def _edit(self):
+        if self.members:
+            await self.message.edit(content=digest_text(self.members.values()))
+
+# Digests still gathering warnings: { text_channel_id: WarningDigest }
+open_digests = {}
+
+def close_digest(digest):
+    """Stop gathering members for a digest and queue its message."""
+    if open_digests.get(digest.channel.id) is digest:
+        del open_digests[digest.channel.id]
+    if digest.closed:
+        return
+    digest.closed = True
+    action_queue.enqueue(digest.guild_id, (digest, 'digest'), digest.post, on_failure=digest.failed,
+                         not_found_ok=False)
+
+def flush_warning_messages():
+    """Process pending member updates and queue open digests, status board
+    updates, Speak exemption changes and buffered deletions now."""
+    process_member_updates()
+    for digest in list(open_digests.values()):
+        close_digest(digest)
+    for board in status_boards.values():
+        if board.scheduled:
+            board.handle.cancel()
+            board._queue_update()
+    for channels in speak_overwrites.values():
+        for channel in channels.values():
+            if channel.scheduled:
+                channel.handle.cancel()
+                channel._queue_update()
+    for channel_id, (messages, handle) in list(deletion_buffers.items()):
+        flush_deletions(messages[0].channel.guild.id, channel_id)
 
-            # Clean up warnings dict
+class StatusBoard:
+    """One persistent "camera compliance" message per guild listing warned members.
+
+    Changes only mark the board dirty; the message is edited at most once
+    every BOARD_INTERVAL seconds. Deadlines are rendered as Discord relative
+    timestamps, so the countdown stays current without further edits.
+    """
+
+    def __init__(self, guild_id, channel, message=None):
+        self.guild_id = guild_id
+        self.channel = channel
+        self.message = message
+        self.last_update = 0.0
+        self.scheduled = False
+        self.handle = None
+
+    @property
+    def message_id(self):
+        return self.message.id if self.message is not None else 0
+
+    def resolve(self, member_id):
+        self.touch()
+
+    def touch(self):
+        """Schedule a (throttled) refresh of the board."""
+        if self.scheduled:
+            return
+        self.scheduled = True
+        delay = max(0.0, self.last_update + BOARD_INTERVAL - time.monotonic())
+        self.handle = asyncio.get_running_loop().call_later(delay, self._queue_update)
+
+    def _queue_update(self):
+        self.scheduled = False
+        action_queue.enqueue(self.guild_id, (self.channel.id, 'board'), self.update)
+
+    def content(self):
+        pending = sorted(
+            (entry.deadline, member_id)
+            for member_id, entry in guild_warnings.get(self.guild_id, {}).items()
+            if entry.shared is self
+        )
+        if not pending:
+            return "📷 **Camera check:** everyone in the monitored channels has their camera on."
+
+        lines = ["📷 **Camera check:** turn your camera on or you will be kicked from voice."]
+        for deadline, member_id in pending[:BOARD_MAX_LINES]:
+            lines.append(f"• <@{member_id}> kicked <t:{int(deadline)}:R>")
+        if len(pending) > BOARD_MAX_LINES:
+            lines.append(f"…and {len(pending) - BOARD_MAX_LINES} more")
+        return '\n'.join(lines)
+
+    async def update(self):
+        self.last_update = time.monotonic()
+        content = self.content()
+        if self.message is not None:
             try:
-                del guild_warnings[guild_id_str][member.id]
-            except KeyError:
-                pass
-    except Exception as e:
-        print(f"Error in kick_after_delay for {member.guild.name}: {e}")
+                await self.message.edit(content=content)
+                return
+            except discord.errors.NotFound:
+                # Someone deleted the board, post a new one
+                self.message = None
+
+        message = await self.channel.send(content)
+        self.message = self.channel.get_partial_message(message.id)
+        await config_store.set_option(str(self.guild_id), 'board_message_id', self.message.id)
+
+        # Warnings recorded before the board was posted point at no message
+        for member_id, entry in guild_warnings.get(self.guild_id, {}).items():
+            if entry.shared is self:
+                config_store.save_warning(self.guild_id, member_id, self.channel.id,
+                                          self.message.id, entry.deadline)
+
+# Status boards of guilds in "board" warning mode: { guild_id: StatusBoard }
+status_boards = {}
+
+def get_status_board(guild_id, channel):
+    """Return the guild's status board, reusing the message recorded in its config."""
+    board = status_boards.get(guild_id)
+    if board is None or board.channel.id != channel.id:
+        board_message_id = config['guilds'].get(str(guild_id), {}).get('board_message_id')
+        message = channel.get_partial_message(board_message_id) if board_message_id else None
+        board = status_boards[guild_id] = StatusBoard(guild_id, channel, message)
+    return board
+
+async def kick_expired(expired):
+    """Kick every member whose warning deadline passed on the same timer tick."""
+    for guild_id, member_id in expired:
+        expire_warning(guild_id, member_id)
+
+def expire_warning(guild_id, member_id):
+    """Deadline reached. If user still has camera off, kick them from voice."""
+    # If user is still in the warnings dict, they haven't turned on camera
+    entry = guild_warnings.get(guild_id, {}).pop(member_id, None)
+    if entry is None:
+        return
+    config_store.delete_warning(guild_id, member_id)
+    metrics.guild(guild_id).kicks += 1
+
+    states = member_states.get(guild_id, {})
+    if member_id in states:
+        states[member_id] = MEMBER_KICKED
+
+    async def kick():
+        # Resolve and re-check when the action runs, the member may have left meanwhile
+        guild = bot.get_guild(guild_id)
+        member = guild.get_member(member_id) if guild else None
+        voice = member.voice if member else None
+        policy = guild_policies.get(guild_id)
+        if not (policy and voice and voice.channel and voice.channel.id in policy.voice_channels):
+            return
+        if voice.self_video:
+            # Turned the camera on while the kick waited in the queue
+            if states.get(member_id) == MEMBER_KICKED:
+                states[member_id] = MEMBER_COMPLIANT
+                grant_speak(guild_id, member)
+                set_mute(guild_id, member, False)
+            return
+        await member.move_to(None)  # Kick from channel
+
+    def failed():
+        # Let the next voice update warn them again
+        if states.get(member_id) == MEMBER_KICKED:
+            del states[member_id]
+
+    action_queue.enqueue(guild_id, (member_id, 'kick'), kick, on_failure=failed)
+
+    # Remove warning message
+    release_warning_message(guild_id, member_id, entry)
+
+def restore_warnings():
+    """Reschedule warnings persisted before a restart against live voice states.
+
+    Members still in a monitored channel with their camera off keep their
+    original deadline (overdue ones fire on the next tick). Everyone else has
+    their stale warning message removed and, if they turned their camera on
+    in the meantime, is unmuted.
+    """
+    rows = config_store.load_warnings()
+
+    # Warnings sharing a message were posted as a digest
+    shared_count = {}
+    for row in rows:
+        shared_count[row[3]] = shared_count.get(row[3], 0) + 1
+
+    digests = {}  # { message_id: WarningDigest }
+    stale = []  # (guild_id, channel, message_id, shared) of resolved warnings
+    for guild_id, member_id, channel_id, message_id, deadline in rows:
+        guild = bot.get_guild(guild_id)
+        policy = guild_policies.get(guild_id)
+        member = guild.get_member(member_id) if guild else None
+        voice = member.voice if member else None
+        channel = bot.get_channel(channel_id)
+        warning_msg = channel.get_partial_message(message_id) if channel and message_id else None
+
+        shared = None
+        guild_config = config['guilds'].get(str(guild_id), {})
+        if (policy is not None and policy.warning_mode == 'board'
+                and message_id in (0, guild_config.get('board_message_id'))):
+            shared = get_status_board(guild_id, channel) if channel else None
+        elif warning_msg and shared_count[message_id] > 1:
+            shared = digests.get(message_id)
+            if shared is None:
+                shared = digests[message_id] = WarningDigest(guild_id, channel, warning_msg)
+
+        in_monitored = (policy is not None and voice is not None and voice.channel is not None
+                        and voice.channel.id in policy.voice_channels)
+        if config_store.legacy_mutes and voice is not None and voice.mute:
+            # Warnings from before mute tracking: everyone warned was muted by the bot
+            claim_mute(guild_id, member_id)
+        if in_monitored and not voice.self_video:
+            if isinstance(shared, WarningDigest):
+                shared.members[member_id] = member.mention
+            guild_warnings.setdefault(guild_id, {})[member_id] = WarningRecord(
+                guild_id, member_id, channel_id, message_id, deadline, shared)
+            member_states.setdefault(guild_id, {})[member_id] = MEMBER_WARNED
+            warning_timers.schedule((guild_id, member_id), deadline)
+            continue
+
+        config_store.delete_warning(guild_id, member_id)
+        stale.append((guild_id, channel, message_id, shared))
+        if in_monitored:
+            member_states.setdefault(guild_id, {})[member_id] = MEMBER_COMPLIANT
+            set_mute(guild_id, member, False)
+
+    # Drop stale messages, and stale mentions from shared messages still in use
+    for guild_id, channel, message_id, shared in stale:
+        if isinstance(shared, StatusBoard):
+            shared.touch()
+        elif isinstance(shared, WarningDigest):
+            if shared.members:
+                shared.refresh()
+            elif digests.pop(message_id, None) is not None:
+                delete_message(guild_id, shared.message)
+        elif channel and message_id:
+            delete_message(guild_id, channel.get_partial_message(message_id))
+    for board in status_boards.values():
+        board.touch()
+
+def reconcile_guild(guild_id):
+    """Bring a guild's member states in line with its current voice states.
+
+    Everyone in a monitored channel goes through update_member_state as if
+    they had just joined, so only members with their camera off who are not
+    already warned get muted and warned. Members already warned are muted
+    again through the current mute strategy, and bots are exempted from
+    Speak denies. Tracked members no longer in a monitored channel (or in a
+    guild no longer enforced) are released, and channels no longer muted
+    through overwrites are restored.
+    """
+    policy = guild_policies.get(guild_id)
+    guild = bot.get_guild(guild_id)
+    if guild is None:
+        return
+    release_speak_overwrites(guild_id)
+
+    present = set()
+    for channel_id in policy.voice_channels if policy is not None and policy.enforced else ():
+        channel = bot.get_channel(channel_id)
+        for member in getattr(channel, 'members', ()):
+            voice = member.voice
+            if member.bot:
+                grant_speak(guild_id, member)
+                continue
+            if voice is None:
+                continue
+            present.add(member.id)
+            if member_states.get(guild_id, {}).get(member.id) == MEMBER_WARNED and not voice.self_video:
+                # Already warned; the mute strategy may have changed since
+                mute_camera_off(guild_id, member)
+            update_member_state(guild_id, member, True, voice.self_video)
+
+    for member_id in [m for m in member_states.get(guild_id, ()) if m not in present]:
+        member = guild.get_member(member_id) or discord.Object(member_id)
+        update_member_state(guild_id, member, False, False)
+
+    # Lift the bot's mutes of members in voice outside the monitored channels
+    for member_id in [m for m in bot_mutes.get(guild_id, ()) if m not in present]:
+        member = guild.get_member(member_id)
+        if member is not None:
+            set_mute(guild_id, member, False)
+
+async def reconcile_voice_states():
+    """Reconcile every configured guild, RECONCILE_CONCURRENCY guilds at a time.
+
+    A guild's slot is only freed once its queued API calls are done, so the
+    sweep never issues more than RECONCILE_CONCURRENCY times the per-guild
+    action rate at once, however many guilds there are.
+    """
+    started = time.perf_counter()
+    slots = asyncio.Semaphore(RECONCILE_CONCURRENCY)
+
+    async def sweep(guild_id):
+        async with slots:
+            reconcile_guild(guild_id)
+            await action_queue.join(guild_id)
+
+    # Apply voice updates queued before the sweep first
+    process_member_updates()
+    await asyncio.gather(*(sweep(guild_id) for guild_id in list(guild_policies)))
+    log.info('Reconciled voice states of %d guilds in %.1fs', len(guild_policies), time.perf_counter() - started)
+
+def start_reconcile():
+    """Start a reconciliation sweep, replacing one still in progress."""
+    global reconcile_task
+    if reconcile_task is not None:
+        reconcile_task.cancel()
+    reconcile_task = asyncio.create_task(reconcile_voice_states())
+
+reconcile_task = None
+
+def validate_guild_config(guild_id_str, guild_config):
+    """Raise ValueError if a reloaded guild entry could not be enforced as written."""
+    if not guild_id_str.isdigit() or not isinstance(guild_config, dict):
+        raise ValueError(f"guild {guild_id_str!r}: expected a guild ID mapped to an object")
+    voice_channels = guild_config.get('voice_channels', [])
+    if not isinstance(voice_channels, list) or not all(isinstance(c, int) for c in voice_channels):
+        raise ValueError(f"guild {guild_id_str}: voice_channels must be a list of channel IDs")
+    if not isinstance(guild_config.get('text_channel_id', 0), int):
+        raise ValueError(f"guild {guild_id_str}: text_channel_id must be a channel ID")
+    if guild_config.get('warning_mode', 'message') not in WARNING_MODES:
+        raise ValueError(f"guild {guild_id_str}: warning_mode must be one of {', '.join(WARNING_MODES)}")
+    if guild_config.get('mute_strategy', 'member') not in MUTE_STRATEGIES:
+        raise ValueError(f"guild {guild_id_str}: mute_strategy must be one of {', '.join(MUTE_STRATEGIES)}")
+    camera_grace = guild_config.get('camera_grace', 0)
+    if not isinstance(camera_grace, int) or not 0 <= camera_grace <= MAX_CAMERA_GRACE:
+        raise ValueError(f"guild {guild_id_str}: camera_grace must be 0-{MAX_CAMERA_GRACE} seconds")
+
+def apply_config_changes(changes):
+    """Swap in the guild entries changed by an external edit of config.json.
+
+    Every entry is replaced before any policy is rebuilt, all without
+    yielding to the loop, so no voice event sees a half-applied edit. Each
+    changed guild is then reconciled: warnings in channels that are no
+    longer monitored are cancelled and newly monitored channels enforced.
+    """
+    for guild_id_str, guild_config in changes.items():
+        if guild_config is None:
+            config['guilds'].pop(guild_id_str, None)
+        else:
+            config['guilds'][guild_id_str] = guild_config
+    for guild_id_str in changes:
+        rebuild_policies(guild_id_str)
+    for guild_id_str in changes:
+        reconcile_guild(int(guild_id_str))
+    log.info('Reloaded the configuration of %d guilds from %s', len(changes), CONFIG_PATH)
+
+def apply_config_settings(settings):
+    """Adopt the top-level settings of an external edit of config.json.
+
+    They are only kept so the next write of config.json does not revert
+    them; settings such as "metrics_port" or "profile" take effect on the
+    next restart.
+    """
+    for key in [key for key in config if key != 'guilds' and key not in settings]:
+        del config[key]
+    config.update(settings)
+    log.info('Top-level settings of %s changed, they apply after a restart', CONFIG_PATH)
+
+# Reloads external edits of config.json; the database is the source of truth
+# with "storage": "sqlite", so there is nothing to watch then
+config_watcher = None
+if isinstance(config_store, JsonConfigStore) and config.get('config_reload_interval', 5):
+    config_watcher = ConfigWatcher(CONFIG_PATH, apply_config_changes, validate_guild_config,
+                                   interval=config.get('config_reload_interval', 5),
+                                   on_settings=apply_config_settings)
+    config_watcher.written(config)
+    config_store.writer.before_write = config_watcher.writing
+    config_store.writer.on_write = config_watcher.written
+
+# Single scheduler for every pending warning, keyed by (guild_id (int), member_id)
+warning_timers = TimerWheel(kick_expired)
+
+# Camera-off grace periods in progress, keyed like warning_timers
+grace_timers = TimerWheel(grace_expired, tick=0.25)
+
+# Every moderation API call goes through this queue, paced per guild
+action_queue = ActionQueue(observer=metrics.record_action)
+
+# Resolved warning messages waiting for a bulk delete: { channel_id: ([messages], <TimerHandle>) }
+deletion_buffers = {}
+
+metrics.gauge('active_timers', 'Warning deadlines pending in the timer wheel.', lambda: len(warning_timers))
+metrics.gauge('pending_warnings', 'Entries in guild_warnings.',
+              lambda: sum(len(warnings) for warnings in guild_warnings.values()))
+metrics.gauge('queued_actions', 'API calls waiting in the action queue.', lambda: action_queue.depth())
+metrics.guild_gauge('guild_queued_actions', 'API calls waiting in the action queue, per guild.',
+                    lambda: action_queue.depths())
+metrics.gauge('surging_channels', 'Monitored channels in a join surge.',
+              lambda: sum(rate.surging(time.monotonic()) for rate in join_rates.values()))
 
 # ------------------------- Admin Commands -------------------------
+# Each command is available as a ! prefix command and as a slash command
+# (see COMMAND_MODES); both call the helpers below and send their reply.
 
-@bot.command()
-@commands.has_permissions(administrator=True)
-async def addvoicechannel(ctx, channel: discord.VoiceChannel):
-    """Add a voice channel to monitor in this server."""
-    guild_id_str = str(ctx.guild.id)
+async def add_voice_channel(guild, channel):
+    guild_id_str = str(guild.id)
 
-    if guild_id_str not in config['guilds']:
-        config['guilds'][guild_id_str] = {'voice_channels': []}
-    
-    if 'voice_channels' not in config['guilds'][guild_id_str]:
-        config['guilds'][guild_id_str]['voice_channels'] = []
+    voice_channels = config['guilds'].get(guild_id_str, {}).get('voice_channels', [])
 
-    voice_channels = config['guilds'][guild_id_str]['voice_channels']
-    
     if channel.id in voice_channels:
-        await ctx.send(f"{channel.mention} is already being monitored!")
-        return
+        return f"{channel.mention} is already being monitored!"
 
-    voice_channels.append(channel.id)
-    save_config()
-    await ctx.send(f"Added {channel.mention} to monitored voice channels!")
+    await config_store.add_voice_channel(guild_id_str, channel.id)
+    rebuild_policies(guild_id_str)
+    return f"Added {channel.mention} to monitored voice channels!"
 
-@bot.command()
-@commands.has_permissions(administrator=True)
-async def removevoicechannel(ctx, channel: discord.VoiceChannel):
-    """Remove a voice channel from monitoring in this server."""
-    guild_id_str = str(ctx.guild.id)
-    
-    if (guild_id_str not in config['guilds'] or 
+async def remove_voice_channel(guild, channel):
+    guild_id_str = str(guild.id)
+
+    if (guild_id_str not in config['guilds'] or
         'voice_channels' not in config['guilds'][guild_id_str] or
         channel.id not in config['guilds'][guild_id_str]['voice_channels']):
-        await ctx.send(f"{channel.mention} is not being monitored!")
-        return
+        return f"{channel.mention} is not being monitored!"
 
-    config['guilds'][guild_id_str]['voice_channels'].remove(channel.id)
-    save_config()
-    await ctx.send(f"Removed {channel.mention} from monitored voice channels!")
+    await config_store.remove_voice_channel(guild_id_str, channel.id)
+    rebuild_policies(guild_id_str)
+    reconcile_guild(guild.id)
+    return f"Removed {channel.mention} from monitored voice channels!"
+
+def list_channels(guild):
+    guild_id_str = str(guild.id)
 
-@bot.command()
-@commands.has_permissions(administrator=True)
-async def listchannels(ctx):
-    """List all monitored channels in this server."""
-    guild_id_str = str(ctx.guild.id)
-    
     if guild_id_str not in config['guilds']:
-        await ctx.send("No channels are configured for this server!")
-        return
+        return "No channels are configured for this server!"
 
     guild_config = config['guilds'][guild_id_str]
     voice_channels = guild_config.get('voice_channels', [])
     text_channel_id = guild_config.get('text_channel_id')
 
     response = ["**Monitored Channels in this Server:**\n"]
-    
+
     if voice_channels:
         response.append("**Voice Channels:**")
         for channel_id in voice_channels:
-            channel = ctx.guild.get_channel(channel_id)
+            channel = guild.get_channel(channel_id)
             response.append(f"• {channel.mention if channel else 'Unknown Channel'}")
     else:
         response.append("No voice channels configured.")
 
     if text_channel_id:
-        text_channel = ctx.guild.get_channel(text_channel_id)
+        text_channel = guild.get_channel(text_channel_id)
         response.append(f"\n**Warning Channel:**\n• {text_channel.mention if text_channel else 'Unknown Channel'}")
     else:
         response.append("\nNo warning channel configured.")
 
-    await ctx.send('\n'.join(response))
+    response.append(f"\n**Warning Mode:** {guild_config.get('warning_mode', 'message')}")
+    response.append(f"**Camera Grace:** {guild_config.get('camera_grace', 0)} seconds")
+    response.append(f"**Mute Strategy:** {guild_config.get('mute_strategy', 'member')}")
+    response.append(f"**Queued API Calls:** {action_queue.depth(guild.id)}")
+
+    return '\n'.join(response)
+
+async def set_text_channel(guild, channel):
+    guild_id_str = str(guild.id)
+
+    await config_store.set_text_channel(guild_id_str, channel.id)
+    rebuild_policies(guild_id_str)
+    return f"Text channel set to {channel.mention}"
+
+async def set_warning_mode(guild, mode):
+    guild_id_str = str(guild.id)
+
+    if mode not in WARNING_MODES:
+        return f"Warning mode must be one of: {', '.join(WARNING_MODES)}"
+
+    await config_store.set_option(guild_id_str, 'warning_mode', mode)
+    rebuild_policies(guild_id_str)
+    return f"Warning mode set to **{mode}**"
+
+async def set_camera_grace(guild, seconds):
+    guild_id_str = str(guild.id)
+
+    if not 0 <= seconds <= MAX_CAMERA_GRACE:
+        return f"Camera grace must be between 0 and {MAX_CAMERA_GRACE} seconds"
+
+    await config_store.set_option(guild_id_str, 'camera_grace', seconds)
+    rebuild_policies(guild_id_str)
+    return f"Camera grace period set to **{seconds}** seconds"
+
+async def set_mute_strategy(guild, strategy):
+    guild_id_str = str(guild.id)
+
+    if strategy not in MUTE_STRATEGIES:
+        return f"Mute strategy must be one of: {', '.join(MUTE_STRATEGIES)}"
+
+    await config_store.set_option(guild_id_str, 'mute_strategy', strategy)
+    rebuild_policies(guild_id_str)
+    reconcile_guild(guild.id)
+    return f"Mute strategy set to **{strategy}**"
+
+@bot.command()
+@commands.has_permissions(administrator=True)
+async def addvoicechannel(ctx, channel: discord.VoiceChannel):
+    """Add a voice channel to monitor in this server."""
+    await ctx.send(await add_voice_channel(ctx.guild, channel))
+
+@bot.command()
+@commands.has_permissions(administrator=True)
+async def removevoicechannel(ctx, channel: discord.VoiceChannel):
+    """Remove a voice channel from monitoring in this server."""
+    await ctx.send(await remove_voice_channel(ctx.guild, channel))
+
+@bot.command()
+@commands.has_permissions(administrator=True)
+async def listchannels(ctx):
+    """List all monitored channels in this server."""
+    await ctx.send(list_channels(ctx.guild))
 
 @bot.command()
 @commands.has_permissions(administrator=True)
 async def settextchannel(ctx, channel: discord.TextChannel):
     """Set the designated text channel for this server."""
-    guild_id_str = str(ctx.guild.id)
+    await ctx.send(await set_text_channel(ctx.guild, channel))
 
-    if guild_id_str not in config['guilds']:
-        config['guilds'][guild_id_str] = {}
+@bot.command()
+@commands.has_permissions(administrator=True)
+async def setwarningmode(ctx, mode: str):
+    """Choose between per-member warnings, shared digest messages and a status board."""
+    await ctx.send(await set_warning_mode(ctx.guild, mode))
 
-    config['guilds'][guild_id_str]['text_channel_id'] = channel.id
-    save_config()
-    await ctx.send(f"Text channel set to {channel.mention}")
+@bot.command()
+@commands.has_permissions(administrator=True)
+async def setcameragrace(ctx, seconds: int):
+    """Set how long a camera may be off before a warning is sent (0 disables)."""
+    await ctx.send(await set_camera_grace(ctx.guild, seconds))
 
-def save_config():
-    """Save the current configuration to config.json."""
-    with open('config.json', 'w') as f:
-        json.dump(config, f, indent=4)
+@bot.command()
+@commands.has_permissions(administrator=True)
+async def setmutestrategy(ctx, strategy: str):
+    """Mute members one by one, or deny Speak on the channel and exempt compliant members."""
+    await ctx.send(await set_mute_strategy(ctx.guild, strategy))
 
 @addvoicechannel.error
 @removevoicechannel.error
@@ -259,26 +1466,161 @@ async def channel_error(ctx, error):
     else:
         await ctx.send(f"An error occurred: {str(error)}")
 
-# ------------------------- Help Command -------------------------
+# What each setting command accepts, for its error reply
+SETTING_USAGE = {
+    'setwarningmode': f"Warning mode must be one of: {', '.join(WARNING_MODES)}",
+    'setcameragrace': f"Camera grace must be a whole number of seconds between 0 and {MAX_CAMERA_GRACE}",
+    'setmutestrategy': f"Mute strategy must be one of: {', '.join(MUTE_STRATEGIES)}",
+}
+
+@setwarningmode.error
+@setcameragrace.error
+@setmutestrategy.error
+async def setting_error(ctx, error):
+    if isinstance(error, commands.MissingPermissions):
+        await ctx.send("You need administrator permissions to use this command!")
+    elif isinstance(error, (commands.BadArgument, commands.MissingRequiredArgument)):
+        await ctx.send(SETTING_USAGE[ctx.command.name])
+    else:
+        await ctx.send(f"An error occurred: {str(error)}")
+
+# ------------------------- Slash Commands -------------------------
+# Replies are ephemeral: only the admin who ran the command sees them
+
+@bot.tree.command(name='addvoicechannel')
+@app_commands.guild_only()
+@app_commands.default_permissions(administrator=True)
+@app_commands.checks.has_permissions(administrator=True)
+async def slash_addvoicechannel(interaction: discord.Interaction, channel: discord.VoiceChannel):
+    """Add a voice channel to monitor in this server."""
+    await interaction.response.send_message(await add_voice_channel(interaction.guild, channel), ephemeral=True)
+
+@bot.tree.command(name='removevoicechannel')
+@app_commands.guild_only()
+@app_commands.default_permissions(administrator=True)
+@app_commands.checks.has_permissions(administrator=True)
+async def slash_removevoicechannel(interaction: discord.Interaction, channel: discord.VoiceChannel):
+    """Remove a voice channel from monitoring in this server."""
+    await interaction.response.send_message(await remove_voice_channel(interaction.guild, channel), ephemeral=True)
+
+@bot.tree.command(name='listchannels')
+@app_commands.guild_only()
+@app_commands.default_permissions(administrator=True)
+@app_commands.checks.has_permissions(administrator=True)
+async def slash_listchannels(interaction: discord.Interaction):
+    """List all monitored channels in this server."""
+    await interaction.response.send_message(list_channels(interaction.guild), ephemeral=True)
+
+@bot.tree.command(name='settextchannel')
+@app_commands.guild_only()
+@app_commands.default_permissions(administrator=True)
+@app_commands.checks.has_permissions(administrator=True)
+async def slash_settextchannel(interaction: discord.Interaction, channel: discord.TextChannel):
+    """Set the designated text channel for this server."""
+    await interaction.response.send_message(await set_text_channel(interaction.guild, channel), ephemeral=True)
+
+@bot.tree.command(name='setwarningmode')
+@app_commands.guild_only()
+@app_commands.default_permissions(administrator=True)
+@app_commands.checks.has_permissions(administrator=True)
+@app_commands.choices(mode=[app_commands.Choice(name=mode, value=mode) for mode in WARNING_MODES])
+async def slash_setwarningmode(interaction: discord.Interaction, mode: str):
+    """Choose between per-member warnings, shared digest messages and a status board."""
+    await interaction.response.send_message(await set_warning_mode(interaction.guild, mode), ephemeral=True)
+
+@bot.tree.command(name='setcameragrace')
+@app_commands.guild_only()
+@app_commands.default_permissions(administrator=True)
+@app_commands.checks.has_permissions(administrator=True)
+async def slash_setcameragrace(interaction: discord.Interaction,
+                               seconds: app_commands.Range[int, 0, MAX_CAMERA_GRACE]):
+    """Set how long a camera may be off before a warning is sent (0 disables)."""
+    await interaction.response.send_message(await set_camera_grace(interaction.guild, seconds), ephemeral=True)
+
+@bot.tree.command(name='setmutestrategy')
+@app_commands.guild_only()
+@app_commands.default_permissions(administrator=True)
+@app_commands.checks.has_permissions(administrator=True)
+@app_commands.choices(strategy=[app_commands.Choice(name=strategy, value=strategy) for strategy in MUTE_STRATEGIES])
+async def slash_setmutestrategy(interaction: discord.Interaction, strategy: str):
+    """Mute members one by one, or deny Speak on the channel and exempt compliant members."""
+    await interaction.response.send_message(await set_mute_strategy(interaction.guild, strategy), ephemeral=True)
+
+@bot.tree.command(name='dochelp')
+async def slash_dochelp(interaction: discord.Interaction):
+    """Explain how the bot works and list the admin commands."""
+    await interaction.response.send_message(help_text('/'), ephemeral=True)
+
+@bot.tree.error
+async def slash_error(interaction, error):
+    if isinstance(error, app_commands.MissingPermissions):
+        message = "You need administrator permissions to use this command!"
+    else:
+        log.warning('Slash command failed', extra={
+            'guild_id': interaction.guild_id, 'action': interaction.command and interaction.command.name,
+            'error': repr(error),
+        })
+        message = f"An error occurred: {str(error)}"
+    if interaction.response.is_done():
+        await interaction.followup.send(message, ephemeral=True)
+    else:
+        await interaction.response.send_message(message, ephemeral=True)
+
+# ------------------------- Owner Commands -------------------------
+
 @bot.command()
-async def dochelp(ctx):
-    """Provides information on how the bot works and lists admin commands for setup."""
-    help_text = (
+@commands.is_owner()
+async def latency(ctx):
+    """Show enforcement latency percentiles per stage."""
+    await ctx.send(f"```\n{metrics.stage_report()}\n```")
+
+async def dump_latency_stats(interval):
+    """Print the enforcement latency table every ``interval`` seconds."""
+    while True:
+        await asyncio.sleep(interval)
+        log.info('Enforcement latency:\n%s', metrics.stage_report())
+
+# ------------------------- Help Command -------------------------
+def help_text(prefix):
+    return (
         "**__Bot Overview__**\n"
         "• I automatically mute anyone who joins a monitored voice channel with their camera off.\n"
         "• I send them a warning in the configured text channel.\n"
-        "• If they don't turn on the camera within 2 minutes, I kick them from voice.\n\n"
-        
+        "• If they don't turn on the camera within 2 minutes, I kick them from voice.\n"
+        "• Give me Manage Messages in the warning channel to let me clear old warnings in bulk.\n\n"
+
         "**__Admin Commands__**\n"
-        "1. **!addvoicechannel voice-channel**\n"
+        f"1. **{prefix}addvoicechannel voice-channel**\n"
         "   - Add a voice channel to monitor.\n"
-        "2. **!removevoicechannel voice-channel**\n"
+        f"2. **{prefix}removevoicechannel voice-channel**\n"
         "   - Remove a voice channel from monitoring.\n"
-        "3. **!settextchannel #text-channel**\n"
+        f"3. **{prefix}settextchannel #text-channel**\n"
         "   - Set the text channel for warnings.\n"
-        "4. **!listchannels**\n"
+        f"4. **{prefix}listchannels**\n"
         "   - Show all monitored channels.\n"
+        f"5. **{prefix}setwarningmode message|digest|board**\n"
+        "   - Post one warning per member, one shared warning per few seconds,\n"
+        "     or keep a single status board listing everyone warned.\n"
+        f"6. **{prefix}setcameragrace seconds**\n"
+        "   - Ignore cameras that come back on within this many seconds.\n"
+        f"7. **{prefix}setmutestrategy member|channel**\n"
+        "   - Server-mute members one by one, or deny Speak in the monitored channels\n"
+        "     and let members with their camera on (and bots) speak (far fewer API calls).\n"
     )
-    await ctx.send(help_text)
 
-bot.run(config['token'])
+@bot.command()
+async def dochelp(ctx):
+    """Provides information on how the bot works and lists admin commands for setup."""
+    await ctx.send(help_text('!'))
+
+if __name__ == '__main__':
+    log_listener = setup_logging(
+        config.get('log_file', 'docbot.log'),
+        max_bytes=config.get('log_max_bytes', 10 * 1024 * 1024),
+        backups=config.get('log_backups', 5),
+        console=config.get('log_console', True),
+    )
+    try:
+        bot.run(config['token'])
+    finally:
+        log_listener.stop()
@@ -0,0 +1,108 @@
+import json
+import logging
+import queue
+import sys
+import time
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+# Structured fields passed through ``extra=`` that end up as JSON keys
+FIELDS = ('guild_id', 'member_id', 'channel_id', 'action', 'target', 'error', 'suppressed')
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as one JSON object per line."""
+
+    def format(self, record):
+        entry = {
+            'ts': round(record.created, 3),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        for field in FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class GuildRateLimitFilter(logging.Filter):
+    """Lets at most ``burst`` warnings per (guild, message) through every ``period`` seconds.
+
+    Dropped records are counted and reported as ``suppressed`` on the next
+    record let through for the same key, so a guild spamming the same error
+    costs a dict lookup per record instead of a line on disk.
+    """
+
+    def __init__(self, burst=5, period=60.0, max_keys=10_000):
+        super().__init__()
+        self.burst = burst
+        self.period = period
+        self.max_keys = max_keys
+        self._windows = {}  # { (guild_id, msg): [window start, passed, suppressed] }
+
+    def filter(self, record):
+        guild_id = getattr(record, 'guild_id', None)
+        if guild_id is None or record.levelno < logging.WARNING:
+            return True
+
+        key = (guild_id, record.msg)
+        now = time.monotonic()
+        window = self._windows.get(key)
+        if window is None or now - window[0] >= self.period:
+            if window is not None and window[2]:
+                record.suppressed = window[2]
+            if window is None and len(self._windows) >= self.max_keys:
+                self._prune(now)
+            self._windows[key] = [now, 1, 0]
+            return True
+        if window[1] < self.burst:
+            window[1] += 1
+            return True
+        window[2] += 1
+        return False
+
+    def _prune(self, now):
+        expired = [key for key, window in self._windows.items() if now - window[0] >= self.period]
+        for key in expired:
+            del self._windows[key]
+        if len(self._windows) >= self.max_keys:
+            self._windows.clear()
+
+
+class _DeferredQueueHandler(QueueHandler):
+    def prepare(self, record):
+        # Hand the raw record over; formatting happens on the listener thread
+        return record
+
+
+def setup_logging(path='docbot.log', max_bytes=10 * 1024 * 1024, backups=5,
+                  level=logging.INFO, console=True):
+    """Send the "docbot" loggers through a background queue to JSON-lines files.
+
+    The log file is rotated once it reaches ``max_bytes``. Returns the
+    QueueListener; call ``stop()`` on it to flush on exit.
+    """
+    records = queue.SimpleQueue()
+    handler = _DeferredQueueHandler(records)
+    handler.addFilter(GuildRateLimitFilter())
+
+    formatter = JsonFormatter()
+    file_handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups, encoding='utf-8')
+    file_handler.setFormatter(formatter)
+    handlers = [file_handler]
+    if console:
+        stream_handler = logging.StreamHandler(sys.stdout)
+        stream_handler.setFormatter(formatter)
+        handlers.append(stream_handler)
+
+    listener = QueueListener(records, *handlers, respect_handler_level=True)
+    listener.start()
+
+    logger = logging.getLogger('docbot')
+    logger.addHandler(handler)
+    logger.setLevel(level)
+    logger.propagate = False
+    return listener
@@ -0,0 +1,227 @@
+import bisect
+import math
+
+from aiohttp import web
+
+# Seconds, for API call latencies
+DEFAULT_BUCKETS = (0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class GuildStats:
+    """Per-guild counters, bumped with plain attribute increments on the hot path."""
+
+    __slots__ = ('voice_events', 'warnings', 'cancellations', 'kicks')
+
+    FIELDS = {
+        'voice_events': 'Voice state updates handled in monitored guilds.',
+        'warnings': 'Camera warnings issued.',
+        'cancellations': 'Warnings cancelled because the member complied or left.',
+        'kicks': 'Members whose warning deadline expired.',
+    }
+
+    def __init__(self):
+        self.voice_events = 0
+        self.warnings = 0
+        self.cancellations = 0
+        self.kicks = 0
+
+
+class Histogram:
+    """Fixed-bucket cumulative histogram in the Prometheus style."""
+
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self, name, labels=''):
+        sep = ',' if labels else ''
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels}{sep}le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{labels}{sep}le="+Inf"}} {self.count}')
+        suffix = f'{{{labels}}}' if labels else ''
+        lines.append(f'{name}_sum{suffix} {self.sum}')
+        lines.append(f'{name}_count{suffix} {self.count}')
+        return lines
+
+
+class LogHistogram:
+    """Fixed-memory histogram with logarithmic buckets, for latency percentiles.
+
+    Bucket ``i`` covers ``[min_value * growth**(i - 1), min_value * growth**i)``
+    so percentiles carry a relative error below ``growth - 1`` (~19% by
+    default) whatever the number of samples.
+    """
+
+    __slots__ = ('counts', 'count', 'sum', 'max', '_min', '_log_growth')
+
+    def __init__(self, min_value=1e-6, max_value=100.0, growth=2 ** 0.25):
+        self._min = min_value
+        self._log_growth = math.log(growth)
+        self.counts = [0] * (math.ceil(math.log(max_value / min_value) / self._log_growth) + 2)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        if value < self._min:
+            index = 0
+        else:
+            index = min(int(math.log(value / self._min) / self._log_growth) + 1, len(self.counts) - 1)
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, q):
+        """Upper bound of the bucket holding the ``q`` quantile (0 < q <= 1)."""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        cumulative = 0
+        for index, count in enumerate(self.counts):
+            cumulative += count
+            if cumulative >= target:
+                if index == len(self.counts) - 1:
+                    return self.max
+                return min(self._min * math.exp(index * self._log_growth), self.max)
+        return self.max
+
+
+class Metrics:
+    """Registry behind the local /metrics endpoint.
+
+    Guild counters are labeled by guild while there are at most
+    ``max_guild_labels`` guilds and summed into a single series beyond that.
+    Gauges are callables evaluated at scrape time.
+    """
+
+    def __init__(self, prefix='docbot', max_guild_labels=100):
+        self.prefix = prefix
+        self.max_guild_labels = max_guild_labels
+        self.guilds = {}  # { guild_id: GuildStats }
+        self.actions = {}  # { (kind, outcome): count }
+        self.action_latency = {}  # { kind: Histogram }
+        self.stages = {}  # { stage: LogHistogram } of enforcement latencies
+        self.gauges = {}  # { name: (help, callable) }
+        self.guild_gauges = {}  # { name: (help, callable returning { guild_id: value }) }
+
+    def guild(self, guild_id):
+        stats = self.guilds.get(guild_id)
+        if stats is None:
+            stats = self.guilds[guild_id] = GuildStats()
+        return stats
+
+    def stage(self, name):
+        """Return the latency histogram of an enforcement stage."""
+        histogram = self.stages.get(name)
+        if histogram is None:
+            histogram = self.stages[name] = LogHistogram()
+        return histogram
+
+    def stage_report(self):
+        """Human-readable percentile table of every enforcement stage."""
+        lines = [f"{'stage':<12}{'count':>9}{'p50 ms':>10}{'p99 ms':>10}{'p999 ms':>10}{'max ms':>10}"]
+        for name, histogram in self.stages.items():
+            lines.append(
+                f"{name:<12}{histogram.count:>9}"
+                f"{histogram.percentile(0.5) * 1000:>10.3f}{histogram.percentile(0.99) * 1000:>10.3f}"
+                f"{histogram.percentile(0.999) * 1000:>10.3f}{histogram.max * 1000:>10.3f}"
+            )
+        return '\n'.join(lines)
+
+    def gauge(self, name, help, read):
+        self.gauges[name] = (help, read)
+
+    def guild_gauge(self, name, help, read):
+        """Register a gauge read per guild, labeled like the guild counters."""
+        self.guild_gauges[name] = (help, read)
+
+    def record_action(self, kind, duration, error=None):
+        """Record one API call made by the action queue."""
+        if error is None:
+            outcome = 'ok'
+        elif getattr(error, 'status', None) is not None:
+            outcome = f'http_{error.status}'
+        else:
+            outcome = type(error).__name__
+        key = (kind, outcome)
+        self.actions[key] = self.actions.get(key, 0) + 1
+
+        histogram = self.action_latency.get(kind)
+        if histogram is None:
+            histogram = self.action_latency[kind] = Histogram()
+        histogram.observe(duration)
+
+    def render(self):
+        """Render every metric in the Prometheus text exposition format."""
+        p = self.prefix
+        lines = []
+
+        for field, help in GuildStats.FIELDS.items():
+            name = f'{p}_{field}_total'
+            lines += [f'# HELP {name} {help}', f'# TYPE {name} counter']
+            if len(self.guilds) <= self.max_guild_labels:
+                for guild_id, stats in self.guilds.items():
+                    lines.append(f'{name}{{guild="{guild_id}"}} {getattr(stats, field)}')
+            else:
+                lines.append(f'{name} {sum(getattr(stats, field) for stats in self.guilds.values())}')
+
+        name = f'{p}_api_calls_total'
+        lines += [f'# HELP {name} Discord API calls by action and outcome.', f'# TYPE {name} counter']
+        for (kind, outcome), count in self.actions.items():
+            lines.append(f'{name}{{action="{kind}",outcome="{outcome}"}} {count}')
+
+        name = f'{p}_api_call_seconds'
+        lines += [f'# HELP {name} Discord API call latency by action.', f'# TYPE {name} histogram']
+        for kind, histogram in self.action_latency.items():
+            lines += histogram.render(name, f'action="{kind}"')
+
+        name = f'{p}_stage_seconds'
+        lines += [f'# HELP {name} Latency from voice event to each enforcement stage.', f'# TYPE {name} summary']
+        for stage, histogram in self.stages.items():
+            for q in (0.5, 0.99, 0.999):
+                lines.append(f'{name}{{stage="{stage}",quantile="{q}"}} {histogram.percentile(q)}')
+            lines.append(f'{name}_sum{{stage="{stage}"}} {histogram.sum}')
+            lines.append(f'{name}_count{{stage="{stage}"}} {histogram.count}')
+
+        for gauge, (help, read) in self.gauges.items():
+            name = f'{p}_{gauge}'
+            lines += [f'# HELP {name} {help}', f'# TYPE {name} gauge', f'{name} {read()}']
+
+        for gauge, (help, read) in self.guild_gauges.items():
+            name = f'{p}_{gauge}'
+            lines += [f'# HELP {name} {help}', f'# TYPE {name} gauge']
+            values = read()
+            if len(values) <= self.max_guild_labels:
+                for guild_id, value in values.items():
+                    lines.append(f'{name}{{guild="{guild_id}"}} {value}')
+            else:
+                lines.append(f'{name} {sum(values.values())}')
+
+        return '\n'.join(lines) + '\n'
+
+    async def start_server(self, host, port):
+        """Serve GET /metrics on host:port. Returns the aiohttp runner."""
+        async def handle(request):
+            return web.Response(text=self.render(), content_type='text/plain', charset='utf-8',
+                                headers={'X-Content-Type-Options': 'nosniff'})
+
+        app = web.Application()
+        app.router.add_get('/metrics', handle)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, host, port).start()
+        return runner
@@ -0,0 +1,62 @@
+import json
+import queue
+import threading
+import time
+
+
+class VoiceRecorder:
+    """Appends handled voice state updates to a JSON-lines file for replay.
+
+    Recording starts with a ``{"guilds": {...}}`` line holding the guild
+    configuration, followed by one line per event::
+
+        {"t": unix time, "g": guild_id, "m": member_id,
+         "cb": channel before, "ca": channel after (null outside voice),
+         "vb": self_video before, "va": self_video after,
+         "mb": server mute before, "ma": server mute after}
+
+    ``record`` only queues a tuple; lines are formatted and written by a
+    background thread.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+
+    def start(self, guilds):
+        if self._thread is not None:
+            return
+        self._queue.put(json.dumps({'guilds': guilds}, separators=(',', ':')))
+        self._thread = threading.Thread(target=self._run, name='voice-recorder', daemon=True)
+        self._thread.start()
+
+    def record(self, guild_id, member_id, before, after):
+        self._queue.put((
+            time.time(), guild_id, member_id,
+            before.channel.id if before.channel is not None else None,
+            after.channel.id if after.channel is not None else None,
+            before.self_video, after.self_video, before.mute, after.mute,
+        ))
+
+    def stop(self):
+        """Write out queued events and close the file."""
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+
+    def _run(self):
+        with open(self.path, 'a', encoding='utf-8') as f:
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    return
+                if isinstance(item, tuple):
+                    t, g, m, cb, ca, vb, va, mb, ma = item
+                    item = json.dumps({'t': round(t, 3), 'g': g, 'm': m, 'cb': cb, 'ca': ca,
+                                       'vb': vb, 'va': va, 'mb': mb, 'ma': ma}, separators=(',', ':'))
+                f.write(item + '\n')
+                if self._queue.empty():
+                    f.flush()
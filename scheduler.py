@@ -0,0 +1,108 @@
+import asyncio
+import logging
+import math
+import time
+
+log = logging.getLogger('docbot.scheduler')
+
+
+class TimerWheel:
+    """Hashed timer wheel driving many deadlines from a single loop task.
+
+    Entries are plain ``key -> deadline`` pairs stored in the slot for their
+    tick, so a pending deadline costs one dict entry instead of a sleeping
+    coroutine. Cancelling is O(1) and every deadline that falls on the same
+    tick is handed to the callback as one batch.
+    """
+
+    def __init__(self, callback, tick=1.0, slots=256, clock=time.time):
+        self._callback = callback
+        self._tick = tick
+        self._slots = [{} for _ in range(slots)]
+        self._where = {}  # { key: slot index }
+        self._clock = clock
+        self._cursor = int(clock() // tick)  # last tick that has been processed
+        self._wakeup = asyncio.Event()
+        self._task = None
+        self._firing = set()
+
+    def __len__(self):
+        return len(self._where)
+
+    def __contains__(self, key):
+        return key in self._where
+
+    def schedule(self, key, deadline):
+        """Schedule (or reschedule) ``key`` to expire at ``deadline``."""
+        self.cancel(key)
+        tick_no = max(math.ceil(deadline / self._tick), self._cursor + 1)
+        index = tick_no % len(self._slots)
+        self._slots[index][key] = deadline
+        self._where[key] = index
+        self._wakeup.set()
+
+    def cancel(self, key):
+        """Drop a pending deadline. Returns False if it was not scheduled."""
+        index = self._where.pop(key, None)
+        if index is None:
+            return False
+        del self._slots[index][key]
+        return True
+
+    def deadline(self, key):
+        """Return the deadline of a pending key, or None."""
+        index = self._where.get(key)
+        if index is None:
+            return None
+        return self._slots[index][key]
+
+    def advance(self, now):
+        """Process every tick up to ``now`` and return the keys that expired."""
+        target = int(now // self._tick)
+        expired = []
+        steps = min(target - self._cursor, len(self._slots))
+        for step in range(1, steps + 1):
+            slot = self._slots[(self._cursor + step) % len(self._slots)]
+            if not slot:
+                continue
+            due = [key for key, deadline in slot.items() if deadline <= now]
+            for key in due:
+                del slot[key]
+                del self._where[key]
+            expired.extend(due)
+        self._cursor = max(self._cursor, target)
+        return expired
+
+    def start(self):
+        """Start the loop task if it is not already running."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        while True:
+            if not self._where:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            delay = (self._cursor + 1) * self._tick - self._clock()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            expired = self.advance(self._clock())
+            if expired:
+                # Fire in the background so slow HTTP calls never delay the next tick
+                task = asyncio.create_task(self._fire(expired))
+                self._firing.add(task)
+                task.add_done_callback(self._firing.discard)
+
+    async def _fire(self, expired):
+        try:
+            await self._callback(expired)
+        except Exception:
+            log.exception('Error while firing %d expired timers', len(expired))
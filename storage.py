@@ -0,0 +1,487 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+
+log = logging.getLogger('docbot.storage')
+
+
+def write_json_atomic(path, data):
+    """Write ``data`` as JSON to ``path`` through a fsynced temp file and a rename."""
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=4)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+    # Make the rename itself durable
+    try:
+        fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _copy_tree(obj):
+    """Copy the dict/list skeleton of a JSON document so it can leave the loop."""
+    if isinstance(obj, dict):
+        return {key: _copy_tree(value) for key, value in obj.items()}
+    if isinstance(obj, list):
+        return [_copy_tree(value) for value in obj]
+    return obj
+
+
+class DebouncedWriter:
+    """Coalesces bursts of changes into one atomic JSON write in a worker thread.
+
+    ``source`` is a callable returning the document to persist. The document is
+    copied on the event loop (cheap, no formatting) and serialized and written
+    off the loop, so it can keep changing while the write is in flight.
+    ``before_write`` and ``on_write``, if set, are called on the loop with
+    each document before it is written and once it has been written.
+    """
+
+    def __init__(self, path, source, delay=2.0, on_write=None, before_write=None):
+        self.path = path
+        self._source = source
+        self._delay = delay
+        self.on_write = on_write
+        self.before_write = before_write
+        self._dirty = False
+        self._task = None
+        self._lock = asyncio.Lock()
+
+    def schedule(self):
+        """Mark the document dirty; it is written at most ``delay`` seconds later."""
+        self._dirty = True
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            # No loop yet (e.g. during startup): write right away
+            self._dirty = False
+            data = self._source()
+            write_json_atomic(self.path, data)
+            if self.on_write is not None:
+                self.on_write(data)
+            return
+
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._debounce())
+
+    async def _debounce(self):
+        # Changes made while a write was in flight found this task still
+        # running, so keep going until nothing is left to write
+        while True:
+            await asyncio.sleep(self._delay)
+            await self.flush()
+            if not self._dirty:
+                return
+
+    async def flush(self):
+        """Write pending changes now. Used on shutdown."""
+        async with self._lock:
+            if not self._dirty:
+                return
+            self._dirty = False
+            data = _copy_tree(self._source())
+            if self.before_write is not None:
+                self.before_write(data)
+            try:
+                await asyncio.to_thread(write_json_atomic, self.path, data)
+            except OSError as e:
+                self._dirty = True
+                log.error('Failed to write %s', self.path, extra={'error': repr(e)})
+                return
+            if self.on_write is not None:
+                self.on_write(data)
+
+
+WARNING_FLUSH_DELAY = 0.5  # seconds pending warning changes are batched for
+
+
+class ConfigStore:
+    """Base class for guild configuration and warning state backends.
+
+    ``guilds`` is the in-memory cache every lookup goes through, shaped like
+    ``config['guilds']``: { guild_id: { "text_channel_id": id, "voice_channels": [ids] } }.
+    Backends update the cache first and then persist the single change.
+
+    Pending warnings are persisted write-behind as
+    ``(guild_id, member_id, channel_id, message_id, deadline)`` rows so they
+    survive a restart; recording one never waits for the disk. So are the
+    server mutes the bot applied, as ``(guild_id, member_id)`` rows.
+    ``legacy_mutes`` is True on the first start with a store that had no
+    record of mutes yet, when persisted warnings may stand for mutes too.
+    """
+
+    legacy_mutes = False
+
+    def __init__(self, guilds):
+        self.guilds = guilds
+
+    async def add_voice_channel(self, guild_id_str, channel_id):
+        guild_config = self.guilds.setdefault(guild_id_str, {})
+        guild_config.setdefault('voice_channels', []).append(channel_id)
+
+    async def remove_voice_channel(self, guild_id_str, channel_id):
+        self.guilds[guild_id_str]['voice_channels'].remove(channel_id)
+
+    async def set_text_channel(self, guild_id_str, channel_id):
+        self.guilds.setdefault(guild_id_str, {})['text_channel_id'] = channel_id
+
+    async def set_option(self, guild_id_str, key, value):
+        """Set a per-guild enforcement option such as "warning_mode"."""
+        self.guilds.setdefault(guild_id_str, {})[key] = value
+
+    def save_warning(self, guild_id, member_id, channel_id, message_id, deadline):
+        pass
+
+    def delete_warning(self, guild_id, member_id):
+        pass
+
+    def load_warnings(self):
+        """Return every persisted warning as a list of rows."""
+        return []
+
+    def save_mute(self, guild_id, member_id):
+        pass
+
+    def delete_mute(self, guild_id, member_id):
+        pass
+
+    def load_mutes(self):
+        """Return every persisted mute as a list of rows."""
+        return []
+
+    def start(self):
+        """Called once the event loop is running, before any change is recorded."""
+
+    async def close(self):
+        pass
+
+
+class JsonConfigStore(ConfigStore):
+    """Keeps guild configuration inside config.json, rewritten by a DebouncedWriter.
+
+    Pending warnings go to a separate ``warnings_path`` document:
+    { guild_id: { member_id: { "channel_id": id, "message_id": id, "deadline": ts } } }
+    and the bot's mutes to ``mutes_path``: { guild_id: [member_ids] }
+    """
+
+    def __init__(self, path, config, delay=2.0, warnings_path='warnings.json', mutes_path='mutes.json'):
+        super().__init__(config['guilds'])
+        self.writer = DebouncedWriter(path, lambda: config, delay=delay)
+
+        try:
+            with open(warnings_path, 'r') as f:
+                self.warnings = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.warnings = {}
+        self.warnings_writer = DebouncedWriter(warnings_path, lambda: self.warnings, delay=WARNING_FLUSH_DELAY)
+
+        try:
+            with open(mutes_path, 'r') as f:
+                self.mutes = {guild_id: set(members) for guild_id, members in json.load(f).items()}
+        except FileNotFoundError:
+            self.mutes = {}
+            self.legacy_mutes = True
+        except json.JSONDecodeError:
+            self.mutes = {}
+        self.mutes_writer = DebouncedWriter(
+            mutes_path, lambda: {guild_id: sorted(members) for guild_id, members in self.mutes.items()},
+            delay=WARNING_FLUSH_DELAY,
+        )
+
+    async def add_voice_channel(self, guild_id_str, channel_id):
+        await super().add_voice_channel(guild_id_str, channel_id)
+        self.writer.schedule()
+
+    async def remove_voice_channel(self, guild_id_str, channel_id):
+        await super().remove_voice_channel(guild_id_str, channel_id)
+        self.writer.schedule()
+
+    async def set_text_channel(self, guild_id_str, channel_id):
+        await super().set_text_channel(guild_id_str, channel_id)
+        self.writer.schedule()
+
+    async def set_option(self, guild_id_str, key, value):
+        await super().set_option(guild_id_str, key, value)
+        self.writer.schedule()
+
+    def save_warning(self, guild_id, member_id, channel_id, message_id, deadline):
+        self.warnings.setdefault(str(guild_id), {})[str(member_id)] = {
+            'channel_id': channel_id,
+            'message_id': message_id,
+            'deadline': deadline,
+        }
+        self.warnings_writer.schedule()
+
+    def delete_warning(self, guild_id, member_id):
+        members = self.warnings.get(str(guild_id))
+        if not members or members.pop(str(member_id), None) is None:
+            return
+        if not members:
+            del self.warnings[str(guild_id)]
+        self.warnings_writer.schedule()
+
+    def load_warnings(self):
+        return [
+            (int(guild_id), int(member_id), w['channel_id'], w['message_id'], w['deadline'])
+            for guild_id, members in self.warnings.items()
+            for member_id, w in members.items()
+        ]
+
+    def save_mute(self, guild_id, member_id):
+        self.mutes.setdefault(str(guild_id), set()).add(member_id)
+        self.mutes_writer.schedule()
+
+    def delete_mute(self, guild_id, member_id):
+        members = self.mutes.get(str(guild_id))
+        if not members or member_id not in members:
+            return
+        members.discard(member_id)
+        if not members:
+            del self.mutes[str(guild_id)]
+        self.mutes_writer.schedule()
+
+    def load_mutes(self):
+        return [(int(guild_id), member_id) for guild_id, members in self.mutes.items() for member_id in members]
+
+    def start(self):
+        if self.legacy_mutes:
+            # Create the file so later starts are not mistaken for the first
+            self.mutes_writer.schedule()
+
+    async def close(self):
+        await self.writer.flush()
+        await self.warnings_writer.flush()
+        await self.mutes_writer.flush()
+
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS guilds (
+    guild_id INTEGER PRIMARY KEY
+);
+CREATE TABLE IF NOT EXISTS monitored_channels (
+    guild_id INTEGER NOT NULL REFERENCES guilds(guild_id),
+    channel_id INTEGER NOT NULL,
+    PRIMARY KEY (guild_id, channel_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS monitored_channels_channel ON monitored_channels(channel_id);
+CREATE TABLE IF NOT EXISTS warning_channels (
+    guild_id INTEGER PRIMARY KEY REFERENCES guilds(guild_id),
+    channel_id INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS guild_options (
+    guild_id INTEGER NOT NULL REFERENCES guilds(guild_id),
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (guild_id, key)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS warnings (
+    guild_id INTEGER NOT NULL,
+    member_id INTEGER NOT NULL,
+    channel_id INTEGER NOT NULL,
+    message_id INTEGER NOT NULL,
+    deadline REAL NOT NULL,
+    PRIMARY KEY (guild_id, member_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS mutes (
+    guild_id INTEGER NOT NULL,
+    member_id INTEGER NOT NULL,
+    PRIMARY KEY (guild_id, member_id)
+) WITHOUT ROWID;
+"""
+
+
+class SqliteConfigStore(ConfigStore):
+    """Keeps guild configuration in a WAL-mode SQLite database.
+
+    Every admin change is a single-row upsert or delete run in a worker
+    thread. ``legacy_guilds`` (the guilds from config.json) is imported once
+    when the database is first created. Warning changes are coalesced per
+    member and written in one transaction every ``WARNING_FLUSH_DELAY``, along
+    with mute changes.
+    """
+
+    def __init__(self, path, legacy_guilds=None):
+        super().__init__({})
+        self.path = path
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self.legacy_mutes = self._db.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'mutes'").fetchone() is None
+        self._db.executescript(SQLITE_SCHEMA)
+        self._lock = asyncio.Lock()
+        self._pending_warnings = {}  # { (guild_id, member_id): row, or None to delete }
+        self._pending_mutes = {}  # { (guild_id, member_id): True to insert, False to delete }
+        self._warnings_task = None
+
+        if legacy_guilds and not self._migrated():
+            self._migrate(legacy_guilds)
+        self._load()
+
+    def _migrated(self):
+        row = self._db.execute("SELECT value FROM meta WHERE key = 'migrated_from_json'").fetchone()
+        return row is not None
+
+    def _migrate(self, legacy_guilds):
+        """Import the guilds of a config.json document in one transaction."""
+        with self._db:
+            self._db.execute('BEGIN')
+            for guild_id_str, guild_config in legacy_guilds.items():
+                guild_id = int(guild_id_str)
+                self._db.execute('INSERT OR IGNORE INTO guilds (guild_id) VALUES (?)', (guild_id,))
+                self._db.executemany(
+                    'INSERT OR IGNORE INTO monitored_channels (guild_id, channel_id) VALUES (?, ?)',
+                    [(guild_id, channel_id) for channel_id in guild_config.get('voice_channels', [])],
+                )
+                if guild_config.get('text_channel_id'):
+                    self._db.execute(
+                        'INSERT OR REPLACE INTO warning_channels (guild_id, channel_id) VALUES (?, ?)',
+                        (guild_id, guild_config['text_channel_id']),
+                    )
+                self._db.executemany(
+                    'INSERT OR REPLACE INTO guild_options (guild_id, key, value) VALUES (?, ?, ?)',
+                    [(guild_id, key, json.dumps(value)) for key, value in guild_config.items()
+                     if key not in ('voice_channels', 'text_channel_id')],
+                )
+            self._db.execute("INSERT INTO meta (key, value) VALUES ('migrated_from_json', '1')")
+
+    def _load(self):
+        """Fill the in-memory cache from the database."""
+        self.guilds.clear()
+        for (guild_id,) in self._db.execute('SELECT guild_id FROM guilds'):
+            self.guilds[str(guild_id)] = {'voice_channels': []}
+        for guild_id, channel_id in self._db.execute('SELECT guild_id, channel_id FROM monitored_channels'):
+            self.guilds[str(guild_id)]['voice_channels'].append(channel_id)
+        for guild_id, channel_id in self._db.execute('SELECT guild_id, channel_id FROM warning_channels'):
+            self.guilds[str(guild_id)]['text_channel_id'] = channel_id
+        for guild_id, key, value in self._db.execute('SELECT guild_id, key, value FROM guild_options'):
+            self.guilds[str(guild_id)][key] = json.loads(value)
+
+    async def _execute(self, *statements):
+        """Run ``(sql, params)`` statements in one transaction off the event loop."""
+        def run():
+            with self._db:
+                self._db.execute('BEGIN')
+                for sql, params in statements:
+                    self._db.execute(sql, params)
+
+        async with self._lock:
+            try:
+                await asyncio.to_thread(run)
+            except sqlite3.Error as e:
+                log.error('Failed to update %s', self.path, extra={'error': repr(e)})
+
+    async def add_voice_channel(self, guild_id_str, channel_id):
+        await super().add_voice_channel(guild_id_str, channel_id)
+        await self._execute(
+            ('INSERT OR IGNORE INTO guilds (guild_id) VALUES (?)', (int(guild_id_str),)),
+            ('INSERT OR IGNORE INTO monitored_channels (guild_id, channel_id) VALUES (?, ?)',
+             (int(guild_id_str), channel_id)),
+        )
+
+    async def remove_voice_channel(self, guild_id_str, channel_id):
+        await super().remove_voice_channel(guild_id_str, channel_id)
+        await self._execute(
+            ('DELETE FROM monitored_channels WHERE guild_id = ? AND channel_id = ?',
+             (int(guild_id_str), channel_id)),
+        )
+
+    async def set_text_channel(self, guild_id_str, channel_id):
+        await super().set_text_channel(guild_id_str, channel_id)
+        await self._execute(
+            ('INSERT OR IGNORE INTO guilds (guild_id) VALUES (?)', (int(guild_id_str),)),
+            ('INSERT INTO warning_channels (guild_id, channel_id) VALUES (?, ?) '
+             'ON CONFLICT (guild_id) DO UPDATE SET channel_id = excluded.channel_id',
+             (int(guild_id_str), channel_id)),
+        )
+
+    async def set_option(self, guild_id_str, key, value):
+        await super().set_option(guild_id_str, key, value)
+        await self._execute(
+            ('INSERT OR IGNORE INTO guilds (guild_id) VALUES (?)', (int(guild_id_str),)),
+            ('INSERT INTO guild_options (guild_id, key, value) VALUES (?, ?, ?) '
+             'ON CONFLICT (guild_id, key) DO UPDATE SET value = excluded.value',
+             (int(guild_id_str), key, json.dumps(value))),
+        )
+
+    def save_warning(self, guild_id, member_id, channel_id, message_id, deadline):
+        self._pending_warnings[(guild_id, member_id)] = (guild_id, member_id, channel_id, message_id, deadline)
+        self._schedule_warnings()
+
+    def delete_warning(self, guild_id, member_id):
+        self._pending_warnings[(guild_id, member_id)] = None
+        self._schedule_warnings()
+
+    def load_warnings(self):
+        return self._db.execute(
+            'SELECT guild_id, member_id, channel_id, message_id, deadline FROM warnings'
+        ).fetchall()
+
+    def save_mute(self, guild_id, member_id):
+        self._pending_mutes[(guild_id, member_id)] = True
+        self._schedule_warnings()
+
+    def delete_mute(self, guild_id, member_id):
+        self._pending_mutes[(guild_id, member_id)] = False
+        self._schedule_warnings()
+
+    def load_mutes(self):
+        return self._db.execute('SELECT guild_id, member_id FROM mutes').fetchall()
+
+    def _schedule_warnings(self):
+        if self._warnings_task is None or self._warnings_task.done():
+            self._warnings_task = asyncio.create_task(self._flush_warnings_later())
+
+    async def _flush_warnings_later(self):
+        # Changes recorded while a flush awaited the database found this task
+        # still running, so keep going until nothing is pending
+        while True:
+            await asyncio.sleep(WARNING_FLUSH_DELAY)
+            await self.flush_warnings()
+            if not self._pending_warnings and not self._pending_mutes:
+                return
+
+    async def flush_warnings(self):
+        """Write every pending warning and mute change in a single transaction."""
+        pending, self._pending_warnings = self._pending_warnings, {}
+        mutes, self._pending_mutes = self._pending_mutes, {}
+        if not pending and not mutes:
+            return
+        upserts = [row for row in pending.values() if row is not None]
+        deletes = [key for key, row in pending.items() if row is None]
+
+        def run():
+            with self._db:
+                self._db.execute('BEGIN')
+                self._db.executemany('INSERT OR REPLACE INTO warnings VALUES (?, ?, ?, ?, ?)', upserts)
+                self._db.executemany('DELETE FROM warnings WHERE guild_id = ? AND member_id = ?', deletes)
+                self._db.executemany('INSERT OR IGNORE INTO mutes VALUES (?, ?)',
+                                     [key for key, muted in mutes.items() if muted])
+                self._db.executemany('DELETE FROM mutes WHERE guild_id = ? AND member_id = ?',
+                                     [key for key, muted in mutes.items() if not muted])
+
+        async with self._lock:
+            try:
+                await asyncio.to_thread(run)
+            except sqlite3.Error as e:
+                log.error('Failed to update warnings in %s', self.path, extra={'error': repr(e)})
+
+    async def close(self):
+        await self.flush_warnings()
+        async with self._lock:
+            self._db.close()
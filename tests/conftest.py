@@ -0,0 +1,17 @@
+import os
+import sys
+import tempfile
+
+# docbot loads and writes config.json and its state files in the current
+# directory when imported, so run the tests in an empty one
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+_workdir = tempfile.TemporaryDirectory()
+_cwd = os.getcwd()
+os.chdir(_workdir.name)
+
+
+def pytest_unconfigure(config):
+    os.chdir(_cwd)
+    _workdir.cleanup()
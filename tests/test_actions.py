@@ -0,0 +1,96 @@
+import unittest
+from unittest import mock
+
+import discord
+
+from actions import ActionQueue
+
+GUILD = 1
+
+
+def http_error(cls, status):
+    return cls(mock.Mock(status=status, reason='error'), 'error')
+
+
+class ActionQueueTest(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.queue = ActionQueue(rate=None, retries=2, backoff=0)
+        self.ran = []
+        self.failed = []
+
+    def action(self, name, *errors):
+        """A factory that raises ``errors`` one per attempt, then succeeds."""
+        errors = list(errors)
+
+        async def factory():
+            self.ran.append(name)
+            if errors:
+                raise errors.pop(0)
+        return factory
+
+    def enqueue(self, key, factory, **kwargs):
+        self.queue.enqueue(GUILD, key, factory, on_failure=lambda: self.failed.append(key), **kwargs)
+
+    async def test_opposite_cancels_queued(self):
+        self.enqueue((1, 'mute'), self.action('mute'))
+        self.enqueue((1, 'unmute'), self.action('unmute'), cancels=(1, 'mute'))
+        await self.queue.join()
+        self.assertEqual(self.ran, [])
+
+    async def test_opposite_of_running_action_is_queued(self):
+        seen = []
+
+        async def mute():
+            seen.append(self.queue.in_flight(GUILD, (1, 'mute')))
+            self.enqueue((1, 'unmute'), self.action('unmute'), cancels=(1, 'mute'))
+
+        self.enqueue((1, 'mute'), mute)
+        await self.queue.join()
+        self.assertEqual(seen, [True])
+        self.assertEqual(self.ran, ['unmute'])
+        self.assertFalse(self.queue.in_flight(GUILD, (1, 'mute')))
+
+    async def test_newer_replaces_queued(self):
+        self.enqueue((1, 'edit'), self.action('old'))
+        self.enqueue((1, 'edit'), self.action('new'))
+        self.assertEqual(self.queue.depth(GUILD), 1)
+        await self.queue.join()
+        self.assertEqual(self.ran, ['new'])
+
+    async def test_retries_transient_errors(self):
+        self.enqueue((1, 'mute'), self.action('mute', http_error(discord.errors.HTTPException, 429),
+                                               http_error(discord.errors.HTTPException, 503)))
+        await self.queue.join()
+        self.assertEqual(self.ran, ['mute'] * 3)
+        self.assertEqual(self.failed, [])
+
+    async def test_gives_up_after_retries(self):
+        self.enqueue((1, 'mute'), self.action('mute', *[http_error(discord.errors.HTTPException, 502)] * 3))
+        with self.assertLogs('docbot.actions', 'WARNING'):
+            await self.queue.join()
+        self.assertEqual(self.ran, ['mute'] * 3)
+        self.assertEqual(self.failed, [(1, 'mute')])
+
+    async def test_does_not_retry_client_errors(self):
+        self.enqueue((1, 'mute'), self.action('mute', http_error(discord.errors.Forbidden, 403)))
+        with self.assertLogs('docbot.actions', 'WARNING'):
+            await self.queue.join()
+        self.assertEqual(self.ran, ['mute'])
+        self.assertEqual(self.failed, [(1, 'mute')])
+
+    async def test_not_found_ok(self):
+        self.enqueue((1, 'delete'), self.action('delete', http_error(discord.errors.NotFound, 404)))
+        await self.queue.join()
+        self.assertEqual(self.failed, [])
+
+        self.enqueue((1, 'warn'), self.action('warn', http_error(discord.errors.NotFound, 404)),
+                     not_found_ok=False)
+        with self.assertLogs('docbot.actions', 'WARNING'):
+            await self.queue.join()
+        self.assertEqual(self.ran, ['delete', 'warn'])
+        self.assertEqual(self.failed, [(1, 'warn')])
+
+
+if __name__ == '__main__':
+    unittest.main()
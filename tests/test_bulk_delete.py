@@ -0,0 +1,37 @@
+import unittest
+from unittest import mock
+
+import discord
+
+import docbot
+from benchmarks.fakes import FakeWorld
+
+
+class BulkDeleteTest(unittest.IsolatedAsyncioTestCase):
+    """Resolved warnings are deleted even where the bot may not bulk delete."""
+
+    async def asyncSetUp(self):
+        self.world = FakeWorld()
+        self.channel = self.world.add_guild().text_channel
+        self.world.install(docbot)
+        self.messages = [await self.channel.send('warning') for _ in range(3)]
+        self.world.http.calls.clear()
+
+    async def test_bulk(self):
+        await docbot.bulk_delete(self.messages)
+        self.assertEqual(self.world.http.calls, {'message.bulk_delete': 1})
+
+    async def test_without_manage_messages(self):
+        self.channel.manage_messages = False
+        await docbot.bulk_delete(self.messages)
+        self.assertEqual(self.world.http.calls, {'message.delete': 3})
+
+    async def test_forbidden_falls_back(self):
+        forbidden = discord.errors.Forbidden(mock.Mock(status=403, reason='Forbidden'), 'Missing Permissions')
+        with mock.patch.object(self.channel, 'delete_messages', side_effect=forbidden):
+            await docbot.bulk_delete(self.messages)
+        self.assertEqual(self.world.http.calls, {'message.delete': 3})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import asyncio
+import unittest
+from unittest import mock
+
+import docbot
+from benchmarks.fakes import FakeWorld
+
+
+class MailboxIsolationTest(unittest.IsolatedAsyncioTestCase):
+    """A voice update that cannot be applied must not strand other members' updates."""
+
+    async def asyncSetUp(self):
+        self.world = FakeWorld()
+        self.broken = self.world.add_guild()
+        self.healthy = self.world.add_guild()
+        self.world.install(docbot)
+
+    async def join_both(self):
+        a = self.broken.add_member()
+        b = self.healthy.add_member()
+        # Same tick, so both updates are drained by one callback
+        await docbot.on_voice_state_update(*self.world.join(a, self.broken.voice_channels[0]))
+        await docbot.on_voice_state_update(*self.world.join(b, self.healthy.voice_channels[0]))
+        await asyncio.sleep(0)
+        await docbot.action_queue.join()
+        return a, b
+
+    async def test_unresolvable_warning_channel(self):
+        del self.world.channels[self.broken.text_channel.id]
+        docbot.rebuild_policies()
+
+        a, b = await self.join_both()
+
+        self.assertEqual(docbot.member_mailbox, {})
+        self.assertIn(b.id, docbot.guild_warnings[self.healthy.id])
+        self.assertTrue(b.muted)
+        # Neither muted nor tracked without a channel to warn in
+        self.assertFalse(a.muted)
+        self.assertNotIn(a.id, docbot.member_states[self.broken.id])
+        self.assertNotIn(a.id, docbot.guild_warnings[self.broken.id])
+
+    async def test_failing_update_is_isolated(self):
+        send_warning = docbot.send_warning
+
+        def failing(member, text_channel, guild_id, started=None):
+            if guild_id == self.broken.id:
+                raise RuntimeError('boom')
+            send_warning(member, text_channel, guild_id, started)
+
+        with mock.patch.object(docbot, 'send_warning', failing), self.assertLogs('docbot', 'ERROR'):
+            a, b = await self.join_both()
+
+        self.assertEqual(docbot.member_mailbox, {})
+        self.assertIn(b.id, docbot.guild_warnings[self.healthy.id])
+
+
+class LateKickTest(unittest.IsolatedAsyncioTestCase):
+    """A kick still queued when the member turns their camera on is dropped."""
+
+    async def asyncSetUp(self):
+        self.world = FakeWorld()
+        self.guild = self.world.add_guild()
+        self.world.install(docbot)
+
+    async def test_camera_on_before_kick_lands(self):
+        member = self.guild.add_member()
+        await docbot.on_voice_state_update(*self.world.join(member, self.guild.voice_channels[0]))
+        await asyncio.sleep(0)
+        await docbot.action_queue.join()
+        self.assertTrue(member.muted)
+
+        docbot.expire_warning(self.guild.id, member.id)
+        await docbot.on_voice_state_update(*self.world.set_video(member, True))
+        await asyncio.sleep(0)
+        await docbot.action_queue.join()
+
+        self.assertEqual(self.world.http.calls['member.move'], 0)
+        self.assertEqual(docbot.member_states[self.guild.id][member.id], docbot.MEMBER_COMPLIANT)
+        self.assertFalse(member.muted)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import asyncio
+import unittest
+
+import docbot
+from benchmarks.fakes import FakeWorld
+
+LATENCY = 0.05
+
+
+class MuteInFlightTest(unittest.IsolatedAsyncioTestCase):
+    """A camera change while a mute edit is running must not strand the member's mute."""
+
+    async def asyncSetUp(self):
+        self.world = FakeWorld(latency=LATENCY)
+        self.guild = self.world.add_guild()
+        self.world.install(docbot)
+        self.member = self.guild.add_member()
+
+    async def update(self, event):
+        await docbot.on_voice_state_update(*event)
+        await asyncio.sleep(LATENCY / 5)  # let the mailbox drain and the queue start the edit
+
+    async def test_camera_on_while_mute_runs(self):
+        await self.update(self.world.join(self.member, self.guild.voice_channels[0]))
+        self.assertTrue(docbot.action_queue.in_flight(self.guild.id, (self.member.id, 'mute')))
+
+        await self.update(self.world.set_video(self.member, True))
+        await docbot.action_queue.join()
+
+        self.assertFalse(self.member.muted)
+        self.assertEqual(docbot.bot_mutes, {})
+
+    async def test_camera_off_while_unmute_runs(self):
+        await self.update(self.world.join(self.member, self.guild.voice_channels[0]))
+        await docbot.action_queue.join()
+        self.assertTrue(self.member.muted)
+
+        await self.update(self.world.set_video(self.member, True))
+        self.assertTrue(docbot.action_queue.in_flight(self.guild.id, (self.member.id, 'unmute')))
+        self.assertIn(self.member.id, docbot.bot_mutes[self.guild.id])
+
+        await self.update(self.world.set_video(self.member, False))
+        await docbot.action_queue.join()
+
+        self.assertTrue(self.member.muted)
+        self.assertIn(self.member.id, docbot.bot_mutes[self.guild.id])
+
+
+if __name__ == '__main__':
+    unittest.main()
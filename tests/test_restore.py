@@ -0,0 +1,109 @@
+import time
+import unittest
+from unittest import mock
+
+import docbot
+from benchmarks.fakes import FakeWorld
+
+
+class RestoreWarningsTest(unittest.IsolatedAsyncioTestCase):
+    """Persisted warnings are rescheduled or cleaned up against the live voice states."""
+
+    async def asyncSetUp(self):
+        self.world = FakeWorld()
+        self.guild = self.world.add_guild()
+        self.world.install(docbot)
+        self.channel = self.guild.voice_channels[0]
+        self.text_channel = self.guild.text_channel
+        self.rows = []
+        patcher = mock.patch.object(docbot.config_store, 'load_warnings', lambda: self.rows)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def warned(self, self_video=False, muted=True, in_voice=True, message_id=None, deadline=None):
+        """A member with a persisted warning, in the monitored channel unless ``in_voice`` is False."""
+        member = self.guild.add_member()
+        member.muted = muted
+        if muted:
+            docbot.bot_mutes.setdefault(self.guild.id, set()).add(member.id)
+        if in_voice:
+            self.world.join(member, self.channel, self_video)
+        message_id = message_id or member.id  # any unique ID will do
+        deadline = deadline if deadline is not None else time.time() + 60
+        self.rows.append((self.guild.id, member.id, self.text_channel.id, message_id, deadline))
+        return member
+
+    def buffered(self):
+        buffered = docbot.deletion_buffers.get(self.text_channel.id)
+        return [message.id for message in buffered[0]] if buffered else []
+
+    async def test_overdue_and_pending(self):
+        overdue = self.warned(deadline=time.time() - 10)
+        pending = self.warned()
+
+        docbot.restore_warnings()
+
+        for member in (overdue, pending):
+            self.assertIn(member.id, docbot.guild_warnings[self.guild.id])
+            self.assertEqual(docbot.member_states[self.guild.id][member.id], docbot.MEMBER_WARNED)
+        # Overdue deadlines fire on the next tick
+        self.assertEqual(docbot.warning_timers.advance(time.time() + 1), [(self.guild.id, overdue.id)])
+        self.assertIn((self.guild.id, pending.id), docbot.warning_timers)
+
+    async def test_now_compliant(self):
+        member = self.warned(self_video=True)
+
+        docbot.restore_warnings()
+        await docbot.action_queue.join()
+
+        self.assertNotIn(member.id, docbot.guild_warnings.get(self.guild.id, {}))
+        self.assertEqual(docbot.member_states[self.guild.id][member.id], docbot.MEMBER_COMPLIANT)
+        self.assertFalse(member.muted)
+        self.assertEqual(self.buffered(), [self.rows[0][3]])
+
+    async def test_left_voice(self):
+        member = self.warned(in_voice=False)
+
+        docbot.restore_warnings()
+
+        self.assertNotIn(member.id, docbot.member_states.get(self.guild.id, {}))
+        self.assertEqual(self.buffered(), [self.rows[0][3]])
+        # Still muted by the bot, lifted once they are back in voice
+        self.assertIn(member.id, docbot.bot_mutes[self.guild.id])
+
+    async def test_digest_with_resolved_member(self):
+        pending = self.warned(message_id=1000)
+        resolved = self.warned(self_video=True, message_id=1000)
+
+        docbot.restore_warnings()
+        await docbot.action_queue.join()
+
+        digest = docbot.guild_warnings[self.guild.id][pending.id].shared
+        self.assertIsInstance(digest, docbot.WarningDigest)
+        self.assertEqual(digest.message.id, 1000)
+        self.assertEqual(list(digest.members), [pending.id])
+        self.assertNotIn(resolved.id, docbot.guild_warnings[self.guild.id])
+        # The mention of the resolved member is edited out, the message stays
+        self.assertEqual(self.world.http.calls['message.edit'], 1)
+        self.assertEqual(self.buffered(), [])
+
+    async def test_fully_resolved_digest_is_deleted(self):
+        self.warned(self_video=True, message_id=1000)
+        self.warned(in_voice=False, message_id=1000)
+
+        docbot.restore_warnings()
+
+        self.assertEqual(self.buffered(), [1000])
+
+    async def test_legacy_mutes_are_claimed(self):
+        docbot.config_store.legacy_mutes = True
+        member = self.warned()
+        docbot.bot_mutes.clear()
+
+        docbot.restore_warnings()
+
+        self.assertIn(member.id, docbot.bot_mutes[self.guild.id])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import unittest
+
+from scheduler import TimerWheel
+
+
+async def ignore(expired):
+    pass
+
+
+class TimerWheelTest(unittest.TestCase):
+    """Deadlines are driven by advance() on a fake clock, so no loop task is involved."""
+
+    def setUp(self):
+        self.wheel = TimerWheel(ignore, tick=1.0, slots=8, clock=lambda: 0.0)
+
+    def test_same_tick_is_one_batch(self):
+        self.wheel.schedule('a', 2.2)
+        self.wheel.schedule('b', 2.7)
+        self.wheel.schedule('c', 4.0)
+        self.assertEqual(self.wheel.advance(3.0), ['a', 'b'])
+        self.assertEqual(self.wheel.advance(4.0), ['c'])
+        self.assertEqual(len(self.wheel), 0)
+
+    def test_cancel(self):
+        self.wheel.schedule('a', 2.0)
+        self.assertTrue(self.wheel.cancel('a'))
+        self.assertFalse(self.wheel.cancel('a'))
+        self.assertNotIn('a', self.wheel)
+        self.assertEqual(self.wheel.advance(3.0), [])
+
+    def test_reschedule(self):
+        self.wheel.schedule('a', 2.0)
+        self.wheel.schedule('a', 6.0)
+        self.assertEqual(self.wheel.deadline('a'), 6.0)
+        self.assertEqual(self.wheel.advance(3.0), [])
+        self.assertEqual(self.wheel.advance(6.0), ['a'])
+
+    def test_catch_up_after_more_than_a_round(self):
+        self.wheel.schedule('a', 3.0)
+        self.wheel.schedule('b', 5.0)
+        self.assertEqual(sorted(self.wheel.advance(100.0)), ['a', 'b'])
+        # Deadlines scheduled after the jump go to ticks after it
+        self.wheel.schedule('c', 50.0)
+        self.assertEqual(self.wheel.advance(101.0), ['c'])
+
+    def test_deadline_in_a_later_round(self):
+        self.wheel.schedule('a', 20.0)  # same slot as ticks 4 and 12
+        self.assertEqual(self.wheel.advance(5.0), [])
+        self.assertEqual(self.wheel.advance(13.0), [])
+        self.assertIn('a', self.wheel)
+        self.assertEqual(self.wheel.advance(20.0), ['a'])
+
+
+if __name__ == '__main__':
+    unittest.main()
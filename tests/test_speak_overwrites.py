@@ -0,0 +1,69 @@
+import asyncio
+import unittest
+from unittest import mock
+
+import discord
+
+import docbot
+from benchmarks.fakes import FakeWorld
+
+DENY = discord.PermissionOverwrite(speak=False)
+ALLOW = discord.PermissionOverwrite(speak=True)
+
+
+class SpeakOverwritesTest(unittest.IsolatedAsyncioTestCase):
+    """The "channel" mute strategy keeps members with their camera off quiet in every monitored channel."""
+
+    async def asyncSetUp(self):
+        patcher = mock.patch.object(docbot, 'MUTE_BATCH_WINDOW', 0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.world = FakeWorld()
+        self.guild = self.world.add_guild(voice_channels=2)
+        self.world.install(docbot, mute_strategy='channel')
+        self.a, self.b = self.guild.voice_channels
+
+    async def update(self, event):
+        await docbot.on_voice_state_update(*event)
+        await asyncio.sleep(0)  # mailbox
+        await asyncio.sleep(0.01)  # batch window
+        await docbot.action_queue.join()
+
+    def speak(self, channel, target_id):
+        return {target.id: overwrite for target, overwrite in channel.overwrites.items()}.get(target_id)
+
+    async def test_camera_on_is_exempted(self):
+        member = self.guild.add_member()
+        await self.update(self.world.join(member, self.a, self_video=True))
+        await self.update(self.world.join(self.guild.add_member(), self.a))
+
+        self.assertEqual(self.speak(self.a, self.guild.id), DENY)
+        self.assertEqual(self.speak(self.a, member.id), ALLOW)
+        self.assertEqual(self.world.http.calls['member.mute'], 0)
+
+    async def test_warned_member_moves_to_another_channel(self):
+        member = self.guild.add_member()
+        await self.update(self.world.join(member, self.a))
+        self.assertEqual(self.speak(self.a, self.guild.id), DENY)
+
+        await self.update(self.world.move(member, self.b))
+
+        self.assertEqual(docbot.member_states[self.guild.id][member.id], docbot.MEMBER_WARNED)
+        self.assertEqual(self.speak(self.b, self.guild.id), DENY)
+        self.assertIsNone(self.speak(self.b, member.id))
+
+    async def test_bots_are_exempted(self):
+        await self.update(self.world.join(self.guild.add_member(), self.a))
+        music = self.guild.add_member()
+        music.bot = True
+        await self.update(self.world.join(music, self.a))
+        self.assertEqual(self.speak(self.a, music.id), ALLOW)
+
+        await self.update(self.world.move(music, self.b))
+        self.assertIsNone(self.speak(self.a, music.id))
+        self.assertEqual(self.speak(self.b, music.id), ALLOW)
+        self.assertFalse(music.muted)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import os
+import tempfile
+import unittest
+
+from storage import SqliteConfigStore
+
+LEGACY_GUILDS = {
+    '1': {'voice_channels': [10, 11], 'text_channel_id': 20, 'warning_mode': 'digest'},
+    '2': {'voice_channels': [12]},
+}
+
+
+class SqliteConfigStoreTest(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'docbot.db')
+
+    async def asyncTearDown(self):
+        self.tmp.cleanup()
+
+    async def reopen(self, store, legacy_guilds=None):
+        await store.close()
+        return SqliteConfigStore(self.path, legacy_guilds=legacy_guilds)
+
+    async def test_migrate_mutate_reopen(self):
+        store = SqliteConfigStore(self.path, legacy_guilds=LEGACY_GUILDS)
+        self.assertEqual(store.guilds, LEGACY_GUILDS)
+        self.assertTrue(store.legacy_mutes)
+
+        await store.remove_voice_channel('1', 11)
+        await store.set_text_channel('2', 21)
+        await store.set_option('2', 'camera_grace', 15)
+        await store.add_voice_channel('3', 13)
+
+        # config.json is only imported once, later edits of it are ignored
+        store = await self.reopen(store, legacy_guilds={'4': {'voice_channels': [14]}})
+        self.assertEqual(store.guilds, {
+            '1': {'voice_channels': [10], 'text_channel_id': 20, 'warning_mode': 'digest'},
+            '2': {'voice_channels': [12], 'text_channel_id': 21, 'camera_grace': 15},
+            '3': {'voice_channels': [13]},
+        })
+        self.assertFalse(store.legacy_mutes)
+        await store.close()
+
+    async def test_warnings_and_mutes_flush_together(self):
+        store = SqliteConfigStore(self.path)
+        store.save_warning(1, 100, 20, 500, 1000.0)
+        store.save_warning(1, 101, 20, 500, 1000.0)
+        store.save_mute(1, 100)
+        store.save_mute(1, 101)
+        await store.flush_warnings()
+
+        store.save_warning(1, 100, 20, 501, 2000.0)
+        store.delete_warning(1, 101)
+        store.delete_mute(1, 101)
+        # Only the latest change per member is written
+        store.save_warning(1, 102, 20, 502, 3000.0)
+        store.delete_warning(1, 102)
+
+        store = await self.reopen(store)
+        self.assertEqual(store.load_warnings(), [(1, 100, 20, 501, 2000.0)])
+        self.assertEqual(store.load_mutes(), [(1, 100)])
+        await store.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
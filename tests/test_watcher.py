@@ -0,0 +1,61 @@
+import json
+import os
+import tempfile
+import unittest
+
+from watcher import ConfigWatcher
+
+
+class ConfigWatcherTest(unittest.IsolatedAsyncioTestCase):
+    """Edits of config.json are reported as guild changes plus the top-level settings."""
+
+    async def asyncSetUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'config.json')
+        self.changes = []
+        self.settings = []
+        self.watcher = ConfigWatcher(self.path, self.changes.append, on_settings=self.settings.append)
+        data = {'token': 't', 'guilds': {'1': {'voice_channels': [2]}}}
+        self.write(data)
+        self.watcher.written(data)
+
+    async def asyncTearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, data):
+        with open(self.path, 'w') as f:
+            json.dump(data, f)
+        # Make sure the signature changes even within one mtime tick
+        os.utime(self.path, ns=(0, os.stat(self.path).st_mtime_ns + 1))
+
+    async def test_guild_edit(self):
+        self.write({'token': 't', 'guilds': {'1': {'voice_channels': [3]}}})
+        await self.watcher.poll()
+        self.assertEqual(self.changes, [{'1': {'voice_channels': [3]}}])
+        self.assertEqual(self.settings, [])
+
+    async def test_settings_edit(self):
+        self.write({'token': 't', 'metrics_port': 9100, 'guilds': {'1': {'voice_channels': [2]}}})
+        await self.watcher.poll()
+        self.assertEqual(self.changes, [])
+        self.assertEqual(self.settings, [{'token': 't', 'metrics_port': 9100}])
+
+    async def test_own_write_in_flight(self):
+        data = {'token': 't', 'metrics_port': 9100, 'guilds': {'1': {'voice_channels': [2, 3]}}}
+        self.watcher.writing(data)
+        self.write(data)
+        await self.watcher.poll()
+        self.watcher.written(data)
+        self.assertEqual(self.changes, [])
+        self.assertEqual(self.settings, [])
+
+    async def test_invalid_version_is_skipped(self):
+        with open(self.path, 'w') as f:
+            f.write('{"metrics_port": 9100,')
+        with self.assertLogs('docbot.watcher', 'WARNING'):
+            await self.watcher.poll()
+        self.assertEqual(self.settings, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
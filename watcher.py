@@ -0,0 +1,121 @@
+import asyncio
+import json
+import logging
+import os
+
+log = logging.getLogger('docbot.watcher')
+
+
+def _signature(path):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size, st.st_ino
+
+
+def _read_json(path):
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def _settings(data):
+    return {key: value for key, value in data.items() if key != 'guilds'}
+
+
+class ConfigWatcher:
+    """Polls a JSON config file and reports which guilds an edit changed.
+
+    The file is only re-read when its mtime, size or inode changed. A new
+    version is parsed off the loop and passed to ``validate`` (which raises
+    ValueError to reject it) before it is diffed, guild by guild, against the
+    previous version. ``on_change`` is then called with
+    ``{ guild_id_str: guild_config, or None if removed }``. Rejected versions
+    are logged and skipped, and the next edit is diffed against the last
+    accepted one. Versions the bot loaded or wrote itself are reported
+    through ``written`` so they are not mistaken for edits, and a version
+    announced through ``writing`` is recognised by its content while the
+    bot's write is still in flight.
+
+    The top-level settings around "guilds" are not diffed; ``on_settings``
+    is called with all of them whenever an accepted version changed any, so
+    the caller can keep its copy in line with the file.
+    """
+
+    def __init__(self, path, on_change, validate=None, interval=5.0, on_settings=None):
+        self.path = path
+        self._on_change = on_change
+        self._on_settings = on_settings
+        self._validate = validate
+        self._interval = interval
+        self._signature = None
+        self._guilds = {}  # guilds of the last accepted version
+        self._settings = {}  # top-level keys other than "guilds" of the last accepted version
+        self._writing = None  # document the bot is writing, until written() is called
+        self._task = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    def writing(self, data):
+        """Record a version the bot is about to write, so it is not reloaded if seen early."""
+        self._writing = data
+
+    def written(self, data):
+        """Record a version loaded or written by the bot itself so it is not reloaded."""
+        self._writing = None
+        self._signature = _signature(self.path)
+        self._guilds = json.loads(json.dumps(data.get('guilds', {})))
+        self._settings = json.loads(json.dumps(_settings(data)))
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self._interval)
+            try:
+                await self.poll()
+            except Exception:
+                log.exception('Config reload failed')
+
+    async def poll(self):
+        """Check the file once. Returns the changes applied, if any."""
+        signature = _signature(self.path)
+        if signature is None or signature == self._signature:
+            return None
+        self._signature = signature
+
+        try:
+            data = await asyncio.to_thread(_read_json, self.path)
+            if self._writing is not None and data == self._writing:
+                # The bot's own write, seen before it finished
+                return None
+            guilds = data.get('guilds') if isinstance(data, dict) else None
+            if not isinstance(guilds, dict):
+                raise ValueError('"guilds" must be an object')
+            if self._validate is not None:
+                for guild_id_str, guild_config in guilds.items():
+                    self._validate(guild_id_str, guild_config)
+        except (OSError, ValueError) as e:
+            # json.JSONDecodeError is a ValueError
+            log.warning('Ignoring invalid config file', extra={'error': repr(e)})
+            return None
+
+        changes = {
+            guild_id_str: guilds.get(guild_id_str)
+            for guild_id_str in self._guilds.keys() | guilds.keys()
+            if self._guilds.get(guild_id_str) != guilds.get(guild_id_str)
+        }
+        self._guilds = guilds
+        settings = _settings(data)
+        if settings != self._settings:
+            self._settings = settings
+            if self._on_settings is not None:
+                self._on_settings(settings)
+        if changes:
+            self._on_change(changes)
+        return changes